@@ -0,0 +1,161 @@
+"""Differential check and benchmark of the `RequestData` base64 codec.
+
+The previous, character by character implementation is copied below as the reference.
+Random inputs (valid base64, base64 with whitespace and padding in random places, random
+garbage) are decoded with both implementations and the results are compared. Differences
+are only expected where the reference did not follow the `atob()` specification:
+
+- a space is ASCII whitespace and is removed, the reference rejected it
+- "=" is only removed at the end of the input, the reference removed it anywhere
+  (e.g. "YQ==YQ==" decoded to "aa")
+
+Usage: python benchmarks/base64_codec.py
+"""
+
+import base64
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from edupage_api.compression import RequestData  # noqa: E402
+
+CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+def reference_encode(data: str) -> str:
+    for ch in data:
+        if ord(ch) > 255:
+            return None
+
+    length = len(data)
+    out = ""
+    for i in range(0, length, 3):
+        groups_of_six = [None, None, None, None]
+        groups_of_six[0] = ord(data[i]) >> 2
+        groups_of_six[1] = (ord(data[i]) & 0x03) << 4
+
+        if length > i + 1:
+            groups_of_six[1] |= ord(data[i + 1]) >> 4
+            groups_of_six[2] = (ord(data[i + 1]) & 0x0F) << 2
+
+        if length > i + 2:
+            groups_of_six[2] |= ord(data[i + 2]) >> 6
+            groups_of_six[3] = ord(data[i + 2]) & 0x3F
+
+        for k in groups_of_six:
+            out += "=" if k is None else CHARS[k]
+
+    return out
+
+
+def reference_decode(data: str) -> str:
+    for char in "\t\n\f\r":
+        data = data.replace(char, "")
+
+    if len(data) % 4 == 0:
+        if data.endswith("=="):
+            data = data.replace("==", "")
+        elif data.endswith("="):
+            data = data.replace("=", "")
+
+    if len(data) % 4 == 1 or False in [ch in CHARS for ch in data]:
+        return None
+
+    output = ""
+    buffer = 0
+    accumulated_bits = 0
+    for ch in data:
+        buffer <<= 6
+        buffer |= CHARS.index(ch)
+        accumulated_bits += 6
+
+        if accumulated_bits == 24:
+            output += chr((buffer & 0xFF0000) >> 16)
+            output += chr((buffer & 0xFF00) >> 8)
+            output += chr(buffer & 0xFF)
+
+            buffer = 0
+            accumulated_bits = 0
+
+    if accumulated_bits == 12:
+        buffer >>= 4
+        output += chr(buffer)
+    elif accumulated_bits == 18:
+        buffer >>= 2
+        output += chr((buffer & 0xFF00) >> 8)
+        output += chr(buffer & 0xFF)
+
+    return output
+
+
+def is_expected_difference(data: str) -> bool:
+    stripped = "".join(ch for ch in data if ch not in "\t\n\f\r")
+    return " " in stripped or "=" in stripped.rstrip("=")
+
+
+def random_input(rng: random.Random) -> str:
+    kind = rng.randrange(4)
+    if kind == 0:
+        return base64.b64encode(os.urandom(rng.randrange(40))).decode()
+
+    if kind == 1:
+        data = list(base64.b64encode(os.urandom(rng.randrange(40))).decode())
+        for _ in range(rng.randrange(4)):
+            data.insert(rng.randrange(len(data) + 1), rng.choice("\t\n\f\r ="))
+        return "".join(data)
+
+    if kind == 2:
+        # no padding
+        return base64.b64encode(os.urandom(rng.randrange(40))).decode().rstrip("=")
+
+    return "".join(rng.choice(CHARS + "=\t\n\f\r -_.é€") for _ in range(rng.randrange(12)))
+
+
+def check(cases: int = 200_000):
+    rng = random.Random(0)
+    expected = 0
+
+    for _ in range(cases):
+        data = random_input(rng)
+        if reference_decode(data) == RequestData.chromium_base64_decode(data):
+            continue
+
+        if not is_expected_difference(data):
+            raise AssertionError(f"decode({data!r}) differs from the reference")
+        expected += 1
+
+    for _ in range(cases // 10):
+        data = "".join(chr(rng.randrange(300)) for _ in range(rng.randrange(40)))
+        if reference_encode(data) != RequestData.chromium_base64_encode(data):
+            raise AssertionError(f"encode({data!r}) differs from the reference")
+
+    print(f"check    {cases:,} decode and {cases // 10:,} encode cases match")
+    print(f"         ({expected:,} expected differences, see the module docstring)")
+
+
+def measure(name: str, function, data) -> float:
+    start = time.perf_counter()
+    function(data)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<16} {len(data) / elapsed / 2**20:10.1f} MiB/s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    check()
+
+    # about the size of a large compressed timeline response
+    raw = "".join(chr(b) for b in os.urandom(3 * 2**20))
+    encoded = reference_encode(raw)
+
+    before = measure("decode before", reference_decode, encoded)
+    now = measure("decode now", RequestData.chromium_base64_decode, encoded)
+    print(f"speedup          {before / now:10.0f}x")
+
+    before = measure("encode before", reference_encode, raw)
+    now = measure("encode now", RequestData.chromium_base64_encode, raw)
+    print(f"speedup          {before / now:10.0f}x")
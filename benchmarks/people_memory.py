@@ -0,0 +1,117 @@
+"""Memory used by people references on a synthetic large school.
+
+Compares creating a new (dict based) teacher object for every reference, which is what
+happened before people were interned, with the shared `__slots__` objects served by the
+entity registry.
+
+Usage: python benchmarks/people_memory.py
+"""
+
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from edupage_api import Edupage  # noqa: E402
+from edupage_api.people import EduAccountType, Gender, People  # noqa: E402
+
+TEACHERS = 200
+STUDENTS = 2000
+REFERENCES = 50_000
+
+
+@dataclass
+class DictTeacher:
+    person_id: int
+    name: str
+    gender: Gender
+    in_school_since: Optional[datetime]
+    account_type: EduAccountType
+    teacher_to: Optional[datetime]
+    classroom_name: str
+
+
+def make_edupage() -> Edupage:
+    edupage = Edupage()
+
+    teachers = {
+        str(i): {
+            "firstname": f"Teacher{i}",
+            "lastname": "Synthetic",
+            "gender": "F",
+            "classroomid": str(i % 50),
+            "datefrom": "2015-09-01",
+            "dateto": "",
+        }
+        for i in range(1, TEACHERS + 1)
+    }
+    students = {
+        str(10_000 + i): {
+            "firstname": f"Student{i}",
+            "lastname": "Synthetic",
+            "gender": "M",
+            "classid": str(i % 80),
+            "numberinclass": str(i % 30),
+            "datefrom": "2021-09-01",
+        }
+        for i in range(1, STUDENTS + 1)
+    }
+    classrooms = {str(i): {"name": f"Room {i}", "short": f"R{i}"} for i in range(50)}
+
+    edupage.data = {
+        "dbi": {"teachers": teachers, "students": students, "classrooms": classrooms}
+    }
+    edupage.is_logged_in = True
+
+    return edupage
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    references = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del references
+    return size
+
+
+def per_reference_objects(edupage: Edupage):
+    dbi = edupage.data["dbi"]
+
+    references = []
+    for i in range(REFERENCES):
+        teacher_id = str(i % TEACHERS + 1)
+        teacher_data = dbi["teachers"][teacher_id]
+        references.append(
+            DictTeacher(
+                int(teacher_id),
+                f"{teacher_data['firstname']} {teacher_data['lastname']}",
+                Gender.FEMALE,
+                datetime.strptime(teacher_data["datefrom"], "%Y-%m-%d"),
+                EduAccountType.TEACHER,
+                None,
+                dbi["classrooms"][teacher_data["classroomid"]]["short"],
+            )
+        )
+
+    return references
+
+
+def shared_objects(edupage: Edupage):
+    people = People(edupage)
+    return [people.get_teacher(i % TEACHERS + 1) for i in range(REFERENCES)]
+
+
+if __name__ == "__main__":
+    before = measure(lambda: per_reference_objects(make_edupage()))
+    after = measure(lambda: shared_objects(make_edupage()))
+
+    print(f"{REFERENCES} teacher references, {TEACHERS} teachers, {STUDENTS} students")
+    print(f"new object per reference: {before / 1024:10.1f} KiB")
+    print(f"interned slot objects:    {after / 1024:10.1f} KiB")
+    print(f"reduction:                {before / after:10.1f}x")
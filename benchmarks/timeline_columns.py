@@ -0,0 +1,65 @@
+"""Time and peak memory of exporting 100k timeline events column by column.
+
+"rows" is the previous way of building columns: parsing every event into a `TimelineEvent`
+and then appending its fields to lists. "columns" is `get_notification_columns`, which builds
+the columns from the raw timeline items.
+
+Usage: python benchmarks/timeline_columns.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from timeline_parse import make_edupage  # noqa: E402
+
+from edupage_api import Edupage  # noqa: E402
+from edupage_api.dbi import DbiHelper  # noqa: E402
+
+
+def export_rows(edupage: Edupage) -> int:
+    columns = {
+        "event_id": [],
+        "timestamp": [],
+        "event_type": [],
+        "text": [],
+        "author": [],
+        "recipient": [],
+    }
+
+    for event in edupage.get_notifications():
+        columns["event_id"].append(event.event_id)
+        columns["timestamp"].append(event.timestamp)
+        columns["event_type"].append(event.event_type)
+        columns["text"].append(event.text)
+        columns["author"].append(event.author)
+        columns["recipient"].append(event.recipient)
+
+    return len(columns["event_id"])
+
+
+def export_columns(edupage: Edupage) -> int:
+    return len(edupage.get_notification_columns())
+
+
+def measure(name: str, export, edupage: Edupage):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = export(edupage)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<8} {count:,} events in {elapsed:.2f} s, peak {peak / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    edupage = make_edupage()
+    # build the name index outside of the measurement
+    DbiHelper(edupage).fetch_person_data_by_name("")
+
+    measure("rows", export_rows, edupage)
+    measure("columns", export_columns, edupage)
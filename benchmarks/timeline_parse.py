@@ -0,0 +1,110 @@
+"""Throughput of timeline event parsing on a synthetic 100k event payload.
+
+The "before" numbers replay the per-event work of the previous parser: decoding `data`
+twice, `datetime.strptime` for every timestamp, a scan over all `EventType` members and
+two `DbiHelper` person lookups per event. "lazy" parses with `lazy_data=True`, which
+keeps `additional_data` as raw JSON until it is read.
+
+Usage: python benchmarks/timeline_parse.py
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from edupage_api import Edupage  # noqa: E402
+from edupage_api.dbi import DbiHelper  # noqa: E402
+from edupage_api.timeline import EventType  # noqa: E402
+
+EVENTS = 100_000
+
+
+def make_edupage() -> Edupage:
+    rng = random.Random(0)
+    edupage = Edupage()
+
+    teachers = {
+        str(i): {"firstname": f"Teacher{i}", "lastname": "Synthetic"}
+        for i in range(1, 101)
+    }
+    students = {
+        str(1000 + i): {"firstname": f"Student{i}", "lastname": "Synthetic"}
+        for i in range(1, 2001)
+    }
+
+    event_types = [event_type.value for event_type in EventType]
+    items = []
+    for i in range(1, EVENTS + 1):
+        items.append(
+            {
+                "timelineid": str(i),
+                "typ": rng.choice(event_types),
+                "timestamp": f"2024-{rng.randint(1, 12):02}-{rng.randint(1, 28):02} 10:00:00",
+                "text": f"Event {i}",
+                "user_meno": f"Student{rng.randint(1, 2000)} Synthetic",
+                "vlastnik_meno": f"Teacher{rng.randint(1, 100)} Synthetic",
+                "data": json.dumps({"nazov": f"Event {i}", "oldVals": {}}),
+                "pocet_reakcii": "0",
+                "cas_pridania": "2024-01-01 10:00:00",
+                "removed": "0",
+            }
+        )
+
+    edupage.data = {
+        "dbi": {"teachers": teachers, "students": students, "parents": {}},
+        "items": items,
+        "userProps": {},
+    }
+    edupage.is_logged_in = True
+
+    return edupage
+
+
+def parse_before(edupage: Edupage) -> int:
+    count = 0
+    for event in edupage.data["items"]:
+        json.loads(event["data"])
+        list(filter(lambda x: x.value == event["typ"], list(EventType)))
+        datetime.strptime(event["timestamp"], "%Y-%m-%d %H:%M:%S")
+        DbiHelper(edupage).fetch_person_data_by_name(event["user_meno"])
+        DbiHelper(edupage).fetch_person_data_by_name(event["vlastnik_meno"])
+        json.loads(event["data"])
+        datetime.strptime(event["cas_pridania"], "%Y-%m-%d %H:%M:%S")
+        count += 1
+
+    return count
+
+
+def parse_now(edupage: Edupage) -> int:
+    return len(edupage.get_notifications())
+
+
+def parse_lazy(edupage: Edupage) -> int:
+    return len(edupage.get_notifications(lazy_data=True))
+
+
+def measure(name: str, parse, edupage: Edupage):
+    start = time.perf_counter()
+    count = parse(edupage)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<8} {count / elapsed:12,.0f} events/s ({elapsed:.2f} s)")
+    return count / elapsed
+
+
+if __name__ == "__main__":
+    edupage = make_edupage()
+    # build the name index outside of the measurement
+    DbiHelper(edupage).fetch_person_data_by_name("")
+
+    before = measure("before", parse_before, edupage)
+    now = measure("now", parse_now, edupage)
+    lazy = measure("lazy", parse_lazy, edupage)
+
+    print(f"speedup  {now / before:12.1f}x")
+    print(f"lazy     {lazy / before:12.1f}x")
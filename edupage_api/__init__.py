@@ -1,9 +1,7 @@
-import functools
 from datetime import date, datetime
 from io import TextIOWrapper
-from typing import Optional, Union
+from typing import Iterable, Iterator, Optional, Union
 
-import requests
 from requests import Response
 
 from edupage_api.classes import Class, Classes
@@ -15,6 +13,7 @@ from edupage_api.login import Login, TwoFactorLogin
 from edupage_api.lunches import Lunches, Meals
 from edupage_api.messages import Messages
 from edupage_api.module import EdupageModule
+from edupage_api.occupancy import Occupancy, RoomOccupancy
 from edupage_api.parent import Parent
 from edupage_api.people import (
     EduAccount,
@@ -24,20 +23,50 @@ from edupage_api.people import (
     People,
 )
 from edupage_api.ringing import RingingTime, RingingTimes
+from edupage_api.snapshot import DbiSnapshotStore
 from edupage_api.subjects import Subject, Subjects
 from edupage_api.substitution import Substitution, TimetableChange
-from edupage_api.timeline import TimelineEvent, TimelineEvents
-from edupage_api.timetables import Timetable, Timetables
+from edupage_api.timeline import (
+    EventType,
+    TimelineCursor,
+    TimelineEvent,
+    TimelineEvents,
+    TimelineSync,
+)
+from edupage_api.timeline_export import TimelineColumns
+from edupage_api.timeline_store import TimelineStore
+from edupage_api.timetables import Timetable, TimetableBatch, Timetables
+from edupage_api.transport import Transport
 
 
 class Edupage(EdupageModule):
-    def __init__(self, request_timeout=5):
+    def __init__(
+        self,
+        request_timeout=5,
+        dbi_snapshot_store: Optional[DbiSnapshotStore] = None,
+        timeline_store: Optional[TimelineStore] = None,
+        compress_timeline_requests: bool = False,
+        transport: Optional[Transport] = None,
+    ):
         """Initialize `Edupage` object.
 
         Args:
             request_timeout (int, optional): Length of request timeout in seconds.
                 If want to upload bigger files, you will have to increase its value.
                 Defaults to `5`.
+            dbi_snapshot_store (Optional[DbiSnapshotStore], optional): Store for snapshots of the
+                school directory. If set and the directory is unchanged since the stored snapshot,
+                it is loaded from the store on login instead of being rebuilt (otherwise a new
+                snapshot is saved). Defaults to `None`.
+            timeline_store (Optional[TimelineStore], optional): Local database that every parsed
+                notification is written to. It can be queried with `TimelineStore.query` without
+                sending any requests. Defaults to `None`.
+            compress_timeline_requests (bool, optional): Download the notification history
+                compressed, like the web client does (fewer bytes, a bit more CPU).
+                Defaults to `False`.
+            transport (Optional[Transport], optional): The HTTP session used for all requests,
+                e.g. with a bigger connection pool or with pre-warmed connections. Its own timeout
+                is used instead of `request_timeout`. Defaults to `None` (`Transport(request_timeout)`).
         """
 
         self.data = None
@@ -45,11 +74,18 @@ class Edupage(EdupageModule):
         self.subdomain = None
         self.gsec_hash = None
         self.username = None
+        self.entity_registry = None
+        self.dashboard_tokens = None
+        self.dbi_snapshot_store = dbi_snapshot_store
+        self.dbi_snapshot = None
+        self.timeline_store = timeline_store
+        self.compress_timeline_requests = compress_timeline_requests
 
-        self.session = requests.session()
-        self.session.request = functools.partial(
-            self.session.request, timeout=request_timeout
-        )
+        if transport is None:
+            transport = Transport(timeout=request_timeout)
+
+        self.transport = transport
+        self.session = transport
 
     def login(
         self, username: str, password: str, subdomain: str
@@ -163,6 +199,23 @@ class Edupage(EdupageModule):
 
         return Timetables(self).get_my_timetable(date)
 
+    def get_my_timetable_range(
+        self, date_from: date, date_to: date
+    ) -> dict[date, Timetable]:
+        """Get timetables for the logged-in user for a range of dates.
+
+        All timetables are fetched with a single request.
+
+        Args:
+            date_from (datetime.date): The first day of the date range.
+            date_to (datetime.date): The last day of the date range (inclusive).
+
+        Returns:
+            dict[datetime.date, Timetable]: `Timetable` object for every day the server returned a plan for.
+        """
+
+        return Timetables(self).get_my_timetable_range(date_from, date_to)
+
     def get_meals(self, date: date) -> Optional[Meals]:
         """Get lunches.
 
@@ -175,28 +228,262 @@ class Edupage(EdupageModule):
 
         return Lunches(self).get_meals(date)
 
-    def get_notifications(self) -> list[TimelineEvent]:
+    def get_notifications(
+        self,
+        lazy_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ) -> list[TimelineEvent]:
         """Get list of all available notifications.
 
+        The filters are applied before the notifications are parsed, so the notifications
+        that are filtered out cost almost nothing.
+
+        Args:
+            lazy_data (bool, optional): Keep `additional_data` of the notifications as raw JSON
+                and decode it only when it is first accessed. Defaults to `False`.
+            types (Optional[Iterable[EventType]], optional): Only notifications of these types.
+                Defaults to `None` (all types).
+            since (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                at or after this time. Defaults to `None`.
+            until (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                before this time (a date means its midnight). Defaults to `None`.
+            include_removed (bool, optional): Also return removed notifications. Defaults to `True`.
+
         Returns:
             list[TimelineEvent]: List of `TimelineEvent`s.
         """
 
-        return TimelineEvents(self).get_notifications()
+        return TimelineEvents(self).get_notifications(
+            lazy_data=lazy_data,
+            types=types,
+            since=since,
+            until=until,
+            include_removed=include_removed,
+        )
 
-    def get_notification_history(self, date_from: date) -> list[TimelineEvent]:
+    def get_notification_history(
+        self,
+        date_from: date,
+        date_to: Optional[date] = None,
+        window_days: Optional[int] = None,
+        max_workers: int = 4,
+        lazy_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ) -> list[TimelineEvent]:
         """Get a list of all available notifications since `date_from` (until now).
 
         This method can be used instead of `get_notifications` if notifications older than
         1 month are needed.
 
+        For long date ranges, set `window_days` to split the range into windows that are
+        downloaded concurrently (a single response for several years can be too slow for the
+        request timeout). The notifications are merged newest-first (like a single response) and
+        deduplicated.
+
         Args:
             date_from (datetime.date): The first day of the date range
+            date_to (Optional[datetime.date], optional): The last day of the date range. Defaults to `None` (until now).
+            window_days (Optional[int], optional): Length of one download window in days (e.g. `31`).
+                Defaults to `None` (everything in one request).
+            max_workers (int, optional): Maximum number of windows downloaded at once. Defaults to `4`.
+            lazy_data (bool, optional): Keep `additional_data` of the notifications as raw JSON
+                and decode it only when it is first accessed. Defaults to `False`.
+            types (Optional[Iterable[EventType]], optional): Only notifications of these types.
+                Defaults to `None` (all types).
+            since (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                at or after this time. Defaults to `None`.
+            until (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                before this time (a date means its midnight). Defaults to `None`.
+            include_removed (bool, optional): Also return removed notifications. Defaults to `True`.
 
         Returns:
             list[TimelineEvent]: List of all notifications since `date_from` up to now.
+
+        Raises:
+            ValueError: `window_days` is less than 1.
+        """
+        return TimelineEvents(self).get_notifications_history(
+            date_from,
+            date_to,
+            window_days,
+            max_workers,
+            lazy_data=lazy_data,
+            types=types,
+            since=since,
+            until=until,
+            include_removed=include_removed,
+        )
+
+    def iter_notifications(
+        self,
+        lazy_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ) -> Iterator[TimelineEvent]:
+        """Iterate over all available notifications.
+
+        Unlike `get_notifications`, the notifications are parsed one at a time while iterating,
+        so they never have to be in memory all at once. See `get_notifications` for the filters.
+
+        Args:
+            lazy_data (bool, optional): Keep `additional_data` of the notifications as raw JSON
+                and decode it only when it is first accessed. Defaults to `False`.
+            types (Optional[Iterable[EventType]], optional): Only notifications of these types.
+                Defaults to `None` (all types).
+            since (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                at or after this time. Defaults to `None`.
+            until (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                before this time (a date means its midnight). Defaults to `None`.
+            include_removed (bool, optional): Also return removed notifications. Defaults to `True`.
+
+        Returns:
+            Iterator[TimelineEvent]: Iterator of `TimelineEvent`s.
+        """
+
+        return TimelineEvents(self).iter_notifications(
+            lazy_data=lazy_data,
+            types=types,
+            since=since,
+            until=until,
+            include_removed=include_removed,
+        )
+
+    def iter_notification_history(
+        self,
+        date_from: date,
+        date_to: Optional[date] = None,
+        window_days: Optional[int] = None,
+        max_workers: int = 4,
+        lazy_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ) -> Iterator[TimelineEvent]:
+        """Iterate over all available notifications since `date_from` (until now).
+
+        The notifications are downloaded right away, but they are parsed one at a time
+        while iterating. See `get_notification_history` for the arguments.
+
+        Args:
+            date_from (datetime.date): The first day of the date range
+            date_to (Optional[datetime.date], optional): The last day of the date range. Defaults to `None` (until now).
+            window_days (Optional[int], optional): Length of one download window in days. Defaults to `None`.
+            max_workers (int, optional): Maximum number of windows downloaded at once. Defaults to `4`.
+            lazy_data (bool, optional): Keep `additional_data` of the notifications as raw JSON
+                and decode it only when it is first accessed. Defaults to `False`.
+            types (Optional[Iterable[EventType]], optional): Only notifications of these types.
+                Defaults to `None` (all types).
+            since (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                at or after this time. Defaults to `None`.
+            until (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                before this time (a date means its midnight). Defaults to `None`.
+            include_removed (bool, optional): Also return removed notifications. Defaults to `True`.
+
+        Returns:
+            Iterator[TimelineEvent]: Iterator of all notifications since `date_from` up to now.
+        """
+
+        return TimelineEvents(self).iter_notification_history(
+            date_from,
+            date_to,
+            window_days,
+            max_workers,
+            lazy_data=lazy_data,
+            types=types,
+            since=since,
+            until=until,
+            include_removed=include_removed,
+        )
+
+    def get_notification_columns(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        window_days: Optional[int] = None,
+        max_workers: int = 4,
+        include_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ) -> TimelineColumns:
+        """Get the notifications as columns, e.g. for analytics or for a DataFrame.
+
+        The columns are built directly from the downloaded notifications, without creating
+        a `TimelineEvent` for each of them. Use `TimelineColumns.to_arrow` or
+        `TimelineColumns.to_parquet` to export them (both need `pyarrow`).
+
+        Args:
+            date_from (Optional[datetime.date], optional): Download the notification history since
+                this date (see `get_notification_history`). Defaults to `None` (only the notifications
+                that are available without downloading the history, like `get_notifications`).
+            date_to (Optional[datetime.date], optional): The last day of the history. Defaults to `None` (until now).
+            window_days (Optional[int], optional): Length of one download window in days. Defaults to `None`.
+            max_workers (int, optional): Maximum number of windows downloaded at once. Defaults to `4`.
+            include_data (bool, optional): Also export `additional_data` (as raw JSON). Defaults to `False`.
+            types (Optional[Iterable[EventType]], optional): Only notifications of these types.
+                Defaults to `None` (all types).
+            since (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                at or after this time. Defaults to `None`.
+            until (Optional[Union[datetime.date, datetime.datetime]], optional): Only notifications
+                before this time (a date means its midnight). Defaults to `None`.
+            include_removed (bool, optional): Also export removed notifications. Defaults to `True`.
+
+        Returns:
+            TimelineColumns: The notifications, column by column.
+        """
+
+        return TimelineEvents(self).get_notification_columns(
+            date_from,
+            date_to,
+            window_days,
+            max_workers,
+            include_data=include_data,
+            types=types,
+            since=since,
+            until=until,
+            include_removed=include_removed,
+        )
+
+    def sync_notifications(
+        self,
+        cursor: Optional[TimelineCursor] = None,
+        date_from: Optional[date] = None,
+        lazy_data: bool = False,
+    ) -> TimelineSync:
+        """Get only the notifications that are new or changed since the last sync.
+
+        The first sync (without a `cursor`) uses the notifications loaded at login and returns
+        all of them as new. Every following sync downloads the notification history since the
+        newest notification seen so far (or since the day of the first sync, if no notification
+        was seen yet, or since `date_from`, if specified). Events that were already seen and whose
+        done, starred and removed state did not change are skipped without being parsed.
+
+        Args:
+            cursor (Optional[TimelineCursor], optional): `TimelineSync.cursor` of the previous sync.
+                Defaults to `None`.
+            date_from (Optional[datetime.date], optional): Download the history since this date
+                instead of since the newest notification of the previous sync. Use it to also catch
+                state changes of older notifications. Defaults to `None`.
+            lazy_data (bool, optional): Keep `additional_data` of the notifications as raw JSON
+                and decode it only when it is first accessed. Defaults to `False`.
+
+        Returns:
+            TimelineSync: The new and changed notifications and the cursor for the next sync.
         """
-        return TimelineEvents(self).get_notifications_history(date_from)
+
+        return TimelineEvents(self).sync_notifications(
+            cursor, date_from, lazy_data
+        )
 
     def cloud_upload(self, fd: TextIOWrapper) -> EduCloudFile:
         """Upload file to EduPage cloud.
@@ -301,6 +588,76 @@ class Edupage(EdupageModule):
 
         return Timetables(self).get_timetable(target, date)
 
+    def get_timetable_range(
+        self,
+        target: Union[EduTeacher, EduStudent, Class, Classroom],
+        date_from: date,
+        date_to: date,
+    ) -> dict[date, Timetable]:
+        """Get timetables of a teacher, student, class, or classroom for a range of dates.
+
+        All timetables are fetched with a single request.
+
+        Args:
+            target (Union[EduTeacher, EduStudent, Class, Classroom]): The target entity whose timetable you want.
+            date_from (datetime.date): The first day of the date range.
+            date_to (datetime.date): The last day of the date range (inclusive).
+
+        Returns:
+            dict[datetime.date, Timetable]: `Timetable` object for every day in the date range.
+        """
+
+        return Timetables(self).get_timetable_range(target, date_from, date_to)
+
+    def get_timetables(
+        self,
+        targets: list[Union[EduTeacher, EduStudent, Class, Classroom]],
+        date_from: date,
+        date_to: date,
+        max_workers: int = 8,
+    ) -> TimetableBatch:
+        """Get timetables of many teachers, students, classes, or classrooms for a range of dates.
+
+        The targets are fetched concurrently. A target that fails (e.g. because of missing
+        permissions) does not stop the others, its exception is collected in `TimetableBatch.errors`.
+
+        Args:
+            targets (list[Union[EduTeacher, EduStudent, Class, Classroom]]): The target entities whose timetables you want.
+            date_from (datetime.date): The first day of the date range.
+            date_to (datetime.date): The last day of the date range (inclusive).
+            max_workers (int, optional): Maximum number of concurrent requests. Values above the
+                connection pool size of the transport (`Transport(pool_maxsize=...)`, 16 by
+                default) open extra connections that are not kept. Defaults to `8`.
+
+        Returns:
+            TimetableBatch: Timetables by date for every successful target and the errors of the failed ones.
+        """
+
+        return Timetables(self).get_timetables(
+            targets, date_from, date_to, max_workers
+        )
+
+    def get_room_occupancy(
+        self, date_from: date, date_to: date, max_workers: int = 8
+    ) -> RoomOccupancy:
+        """Load the timetables of all classrooms and build their occupancy for a range of dates.
+
+        The returned object answers questions like "which rooms are free in period 3 on Monday"
+        or "when are rooms X and Y both free" without sending any more requests.
+        Classrooms whose timetable could not be loaded are in `RoomOccupancy.errors`, their
+        occupancy is unknown and they are never returned as free.
+
+        Args:
+            date_from (datetime.date): The first day of the date range.
+            date_to (datetime.date): The last day of the date range (inclusive).
+            max_workers (int, optional): Maximum number of concurrent requests. Defaults to `8`.
+
+        Returns:
+            RoomOccupancy: Occupancy of all classrooms in the date range.
+        """
+
+        return Occupancy(self).get_room_occupancy(date_from, date_to, max_workers)
+
     def get_next_ringing_time(self, date_time: datetime) -> RingingTime:
         """Get the next lesson's ringing time for given `date_time`.
 
@@ -9,6 +9,15 @@ from edupage_api.people import EduTeacher, People
 
 @dataclass
 class Class:
+    __slots__ = (
+        "class_id",
+        "name",
+        "short",
+        "homeroom_teachers",
+        "homeroom",
+        "grade",
+    )
+
     class_id: int
     name: str
     short: str
@@ -18,14 +27,16 @@ class Class:
 
 
 class Classes(Module):
-    @ModuleHelper.logged_in
-    def get_classes(self) -> Optional[list]:
+    def __build_classes(self) -> Optional[dict[int, Class]]:
         classes_list = DbiHelper(self.edupage).fetch_class_list()
 
         if classes_list is None:
             return None
 
-        classes = []
+        people = People(self.edupage)
+        classrooms = Classrooms(self.edupage)
+
+        classes = {}
 
         for class_id_str, class_info in classes_list.items():
             if not class_id_str:
@@ -36,37 +47,50 @@ class Classes(Module):
                 class_info.get("teacher2id"),
             ]
             home_teachers = [
-                People(self.edupage).get_teacher(tid) for tid in home_teacher_ids if tid
+                people.get_teacher(tid) for tid in home_teacher_ids if tid
             ]
             home_teachers = [ht for ht in home_teachers if ht]
 
             homeroom_id = class_info.get("classroomid")
-            homeroom = Classrooms(self.edupage).get_classroom(homeroom_id)
-
-            classes.append(
-                Class(
-                    int(class_id_str),
-                    class_info["name"],
-                    class_info["short"],
-                    home_teachers if home_teachers else None,
-                    homeroom,
-                    int(class_info["grade"]) if class_info["grade"] else None,
-                )
+            homeroom = classrooms.get_classroom(homeroom_id)
+
+            class_id = int(class_id_str)
+            classes[class_id] = Class(
+                class_id,
+                class_info["name"],
+                class_info["short"],
+                home_teachers if home_teachers else None,
+                homeroom,
+                int(class_info["grade"]) if class_info["grade"] else None,
             )
 
         return classes
 
+    def __get_classes_by_id(self) -> Optional[dict[int, Class]]:
+        return (
+            DbiHelper(self.edupage)
+            .get_registry()
+            .get_group("classes", self.__build_classes)
+        )
+
+    @ModuleHelper.logged_in
+    def get_classes(self) -> Optional[list]:
+        classes = self.__get_classes_by_id()
+
+        if classes is None:
+            return None
+
+        return list(classes.values())
+
     def get_class(self, class_id: Union[int, str]) -> Optional[Class]:
         try:
             class_id = int(class_id)
         except (ValueError, TypeError):
             return None
 
-        return next(
-            (
-                edu_class
-                for edu_class in self.get_classes()
-                if edu_class.class_id == class_id
-            ),
-            None,
-        )
+        classes = self.__get_classes_by_id()
+
+        if classes is None:
+            return None
+
+        return classes.get(class_id)
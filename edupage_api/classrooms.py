@@ -7,46 +7,60 @@ from edupage_api.module import Module, ModuleHelper
 
 @dataclass
 class Classroom:
+    __slots__ = ("classroom_id", "name", "short")
+
     classroom_id: int
     name: str
     short: str
 
 
 class Classrooms(Module):
-    @ModuleHelper.logged_in
-    def get_classrooms(self) -> Optional[list]:
+    def __build_classrooms(self) -> Optional[dict[int, Classroom]]:
         classroom_list = DbiHelper(self.edupage).fetch_classroom_list()
 
         if classroom_list is None:
             return None
 
-        classrooms = []
+        classrooms = {}
 
         for classroom_id_str in classroom_list:
             if not classroom_id_str:
                 continue
 
-            classrooms.append(
-                Classroom(
-                    int(classroom_id_str),
-                    classroom_list[classroom_id_str]["name"],
-                    classroom_list[classroom_id_str]["short"],
-                )
+            classroom_id = int(classroom_id_str)
+            classrooms[classroom_id] = Classroom(
+                classroom_id,
+                classroom_list[classroom_id_str]["name"],
+                classroom_list[classroom_id_str]["short"],
             )
 
         return classrooms
 
+    def __get_classrooms_by_id(self) -> Optional[dict[int, Classroom]]:
+        return (
+            DbiHelper(self.edupage)
+            .get_registry()
+            .get_group("classrooms", self.__build_classrooms)
+        )
+
+    @ModuleHelper.logged_in
+    def get_classrooms(self) -> Optional[list]:
+        classrooms = self.__get_classrooms_by_id()
+
+        if classrooms is None:
+            return None
+
+        return list(classrooms.values())
+
     def get_classroom(self, classroom_id: Union[int, str]) -> Optional[Classroom]:
         try:
             classroom_id = int(classroom_id)
         except (ValueError, TypeError):
             return None
 
-        return next(
-            (
-                classroom
-                for classroom in self.get_classrooms()
-                if classroom.classroom_id == classroom_id
-            ),
-            None,
-        )
+        classrooms = self.__get_classrooms_by_id()
+
+        if classrooms is None:
+            return None
+
+        return classrooms.get(classroom_id)
@@ -83,7 +83,7 @@ class Cloud(Module):
 
         files = {"att": fd}
 
-        response = self.edupage.session.post(request_url, files=files).content.decode()
+        response = self.edupage.transport.post(request_url, files=files).content.decode()
 
         try:
             response_json = json.loads(response)
@@ -1,189 +1,168 @@
+import binascii
+import json
+import urllib.parse
 import zlib
 from hashlib import sha1
-from typing import Union
+from typing import Iterable, Optional, Union
 
 from edupage_api.exceptions import Base64DecodeError
-from edupage_api.module import ModuleHelper
 
 
 # compression parameters from https://github.com/rgnter/epea_cpp
-# encoding and decoding from https://github.com/jsdom/abab
-class RequestData:
+class RequestEncoder:
+    """Encoder of compressed request bodies (the `eqap`/`eqacs`/`eqaz` envelope).
+
+    The compression parameters are set once, for all bodies encoded with the encoder.
+    An encoder can be shared by threads, use `encode_many` to encode many bodies at once.
+    """
+
+    def __init__(
+        self,
+        level: int = -1,
+        memory_level: int = 8,
+        strategy: int = zlib.Z_DEFAULT_STRATEGY,
+    ):
+        self.level = level
+        self.memory_level = memory_level
+        self.strategy = strategy
+
     @staticmethod
-    def __compress(data: bytes) -> bytes:
+    def __encode_form_data(request_data: Union[dict, str, bytes]) -> bytes:
+        if isinstance(request_data, dict):
+            request_data = "&".join(
+                f"{urllib.parse.quote(key)}={urllib.parse.quote(value)}"
+                for key, value in request_data.items()
+            )
+
+        if isinstance(request_data, str):
+            request_data = request_data.encode()
+
+        return request_data
+
+    def __compress(self, data: bytes) -> bytes:
+        # a new compressor is cheaper than a copy of a prepared one (the copy also
+        # copies its whole window)
         compressor = zlib.compressobj(
-            -1, zlib.DEFLATED, -15, 8, zlib.Z_DEFAULT_STRATEGY
+            self.level, zlib.DEFLATED, -15, self.memory_level, self.strategy
         )
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH)
 
-        compressor.compress(data)
-        return compressor.flush(zlib.Z_FINISH)
+    def encode(self, request_data: Union[dict, str, bytes]) -> str:
+        """Encode a request body (a dict of form fields or already encoded form data)."""
 
-    @staticmethod
-    def chromium_base64_encode(data: str) -> str:
-        # "The btoa() method must throw an "InvalidCharacterError" DOMException if
-        # data contains any character whose code point is greater than U+00FF."
-        for ch in data:
-            if ord(ch) > 255:
-                return None
+        encoded = binascii.b2a_base64(
+            self.__compress(RequestEncoder.__encode_form_data(request_data)),
+            newline=False,
+        )
+        data_hash = sha1(encoded).hexdigest()
 
-        length = len(data)
-        i = 0
+        # `urllib.parse.quote` would only replace these two in base64 ("/" is safe)
+        quoted = encoded.replace(b"+", b"%2B").replace(b"=", b"%3D").decode("ascii")
 
-        # Lookup table for btoa(), which converts a six-bit number into the
-        # corresponding ASCII character.
-        chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+        # use "encryption"? (compression)
+        return f"eqap=dz%3A{quoted}&eqacs={data_hash}&eqaz=1"
 
-        def btoa_lookup(index):
-            if index >= 0 and index < 64:
-                return chars[index]
+    def encode_many(self, bodies: Iterable[Union[dict, str, bytes]]) -> list[str]:
+        encode = self.encode
+        return [encode(request_data) for request_data in bodies]
 
-            return None
 
-        out = ""
-        for i in range(0, length, 3):
-            groups_of_six = [None, None, None, None]
-            groups_of_six[0] = ord(data[i]) >> 2
-            groups_of_six[1] = (ord(data[i]) & 0x03) << 4
+# encoding and decoding from https://github.com/jsdom/abab
+class RequestData:
+    __encoder = RequestEncoder()
+
+    # "The Base 64 Alphabet" of RFC 4648
+    BASE64_ALPHABET = (
+        b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+    )
 
-            if length > i + 1:
-                groups_of_six[1] |= ord(data[i + 1]) >> 4
-                groups_of_six[2] = (ord(data[i + 1]) & 0x0F) << 2
+    # "ASCII whitespace" of the Infra standard
+    ASCII_WHITESPACE = b"\t\n\f\r "
 
-            if length > i + 2:
-                groups_of_six[2] |= ord(data[i + 2]) >> 6
-                groups_of_six[3] = ord(data[i + 2]) & 0x3F
+    @staticmethod
+    def chromium_base64_encode_bytes(data: bytes) -> bytes:
+        """Encode `data` like `btoa()` (standard base64 with padding)."""
 
-            for k in groups_of_six:
-                if k is None:
-                    out += "="
-                else:
-                    out += btoa_lookup(k)
+        return binascii.b2a_base64(data, newline=False)
 
-            i += 3
+    @staticmethod
+    def chromium_base64_decode_bytes(data: Union[bytes, str]) -> Optional[bytes]:
+        """Decode `data` like `atob()` ("forgiving-base64 decode"), `None` on failure."""
 
-        return out
+        if isinstance(data, str):
+            try:
+                data = data.encode("ascii")
+            except UnicodeEncodeError:
+                return None
 
-    def chromium_base64_decode(data: str) -> str:
         # "Remove all ASCII whitespace from data."
-        [data := data.replace(char, "") for char in "\t\n\f\r"]
+        data = data.translate(None, RequestData.ASCII_WHITESPACE)
 
         # "If data's code point length divides by 4 leaving no remainder, then: if data ends
         # with one or two U+003D (=) code points, then remove them from data."
         if len(data) % 4 == 0:
-            if data.endswith("=="):
-                data = data.replace("==", "")
-            elif data.endswith("="):
-                data = data.replace("=", "")
-
-        allowed_chars = (
-            "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
-        )
-
-        def atob_lookup(ch: str):
-            try:
-                return allowed_chars.index(ch)
-            except ValueError:
-                return None
+            if data.endswith(b"=="):
+                data = data[:-2]
+            elif data.endswith(b"="):
+                data = data[:-1]
 
         # "If data's code point length divides by 4 leaving a remainder of 1, then return
         # failure."
         #
-        # "If data contains a code point that is not one of
-        #
-        # U+002B (+)
-        # U+002F (/)
-        # ASCII alphanumeric
-        #
-        # then return failure."
-        data_contains_invalid_chars = False in [ch in allowed_chars for ch in data]
-        if len(data) % 4 == 1 or data_contains_invalid_chars:
+        # "If data contains a code point that is not one of U+002B (+), U+002F (/) or
+        # ASCII alphanumeric, then return failure."
+        if len(data) % 4 == 1 or data.translate(None, RequestData.BASE64_ALPHABET):
             return None
 
-        # "Let output be an empty byte sequence."
-        output = ""
-
-        # "Let buffer be an empty buffer that can have bits appended to it."
-        #
-        # We append bits via left-shift and or.  accumulatedBits is used to track
-        # when we've gotten to 24 bits.
-        buffer = 0
-        accumulated_bits = 0
+        # the rest of the algorithm is plain base64 decoding, `binascii` only needs
+        # the padding back
+        return binascii.a2b_base64(data + b"=" * (-len(data) % 4))
 
-        # "Let position be a position variable for data, initially pointing at the
-        # start of data."
-        #
-        # "While position does not point past the end of data:"
-        for ch in data:
-            # "Find the code point pointed to by position in the second column of
-            # Table 1: The Base 64 Alphabet of RFC 4648. Let n be the number given in
-            # the first cell of the same row.
-            #
-            # "Append to buffer the six bits corresponding to n, most significant bit
-            # first."
-            #
-            # atob_lookup() implements the table from RFC 4648.
-            buffer <<= 6
-            buffer |= atob_lookup(ch)
-            accumulated_bits += 6
-
-            # "If buffer has accumulated 24 bits, interpret them as three 8-bit
-            # big-endian numbers. Append three bytes with values equal to those
-            # numbers to output, in the same order, and then empty buffer."
-            if accumulated_bits == 24:
-                output += chr((buffer & 0xFF0000) >> 16)
-                output += chr((buffer & 0xFF00) >> 8)
-                output += chr(buffer & 0xFF)
-
-                buffer = 0
-                accumulated_bits = 0
-
-        # "If buffer is not empty, it contains either 12 or 18 bits. If it contains
-        # 12 bits, then discard the last four and interpret the remaining eight as
-        # an 8-bit big-endian number. If it contains 18 bits, then discard the last
-        # two and interpret the remaining 16 as two 8-bit big-endian numbers. Append
-        # the one or two bytes with values equal to those one or two numbers to
-        # output, in the same order."
-        if accumulated_bits == 12:
-            buffer >>= 4
-            output += chr(buffer)
-        elif accumulated_bits == 18:
-            buffer >>= 2
-            output += chr((buffer & 0xFF00) >> 8)
-            output += chr(buffer & 0xFF)
+    @staticmethod
+    def chromium_base64_encode(data: str) -> Optional[str]:
+        # "The btoa() method must throw an "InvalidCharacterError" DOMException if
+        # data contains any character whose code point is greater than U+00FF."
+        try:
+            data_bytes = data.encode("latin-1")
+        except UnicodeEncodeError:
+            return None
 
-        return output
+        return RequestData.chromium_base64_encode_bytes(data_bytes).decode("ascii")
 
     @staticmethod
-    def __encode_data(data: str) -> bytes:
-        compressed = RequestData.__compress(data.encode())
+    def chromium_base64_decode(data: str) -> Optional[str]:
+        decoded = RequestData.chromium_base64_decode_bytes(data)
+        if decoded is None:
+            return None
 
-        encoded = RequestData.chromium_base64_encode(
-            "".join([chr(ch) for ch in compressed])
-        )
+        # every byte is one character, like the "binary string" `atob()` returns
+        return decoded.decode("latin-1")
 
-        return encoded
+    @staticmethod
+    def encode_request_body(request_data: Union[dict, str]) -> str:
+        return RequestData.__encoder.encode(request_data)
 
     @staticmethod
-    def __decode_data(data: str) -> str:
-        return RequestData.chromium_base64_decode(data)
+    def decode_response_bytes(response: Union[bytes, str, Iterable[bytes]]) -> bytes:
+        """Decode a (possibly compressed) response, e.g. `response.iter_content(2**16)`."""
+
+        decoder = ResponseDecoder()
+
+        if isinstance(response, (bytes, str)):
+            response = [response]
+
+        output = bytearray()
+        for chunk in response:
+            output += decoder.feed(chunk)
+        output += decoder.finish()
+
+        return bytes(output)
 
     @staticmethod
-    def encode_request_body(request_data: Union[dict, str]) -> str:
-        encoded_data = (
-            ModuleHelper.encode_form_data(request_data)
-            if type(request_data) == dict
-            else request_data
-        )
-        encoded_data = RequestData.__encode_data(encoded_data)
-        data_hash = sha1(encoded_data.encode()).hexdigest()
-
-        return ModuleHelper.encode_form_data(
-            {
-                "eqap": f"dz:{encoded_data}",
-                "eqacs": data_hash,
-                "eqaz": "1",  # use "encryption"? (compression)
-            }
-        )
+    def decode_response_json(response: Union[bytes, str, Iterable[bytes]]):
+        """Decode a (possibly compressed) JSON response and parse it."""
+
+        return json.loads(RequestData.decode_response_bytes(response))
 
     @staticmethod
     def decode_response(response: str) -> str:
@@ -195,8 +174,113 @@ class RequestData:
         if not response.startswith("eqz:"):
             return response
 
-        decoded = RequestData.__decode_data(response[4:])
+        return RequestData.decode_response_bytes(response).decode()
+
+
+class ResponseDecoder:
+    """Incremental decoder of edupage responses.
+
+    Responses starting with `eqz:` are base64 encoded raw deflate streams, they are decoded
+    and inflated while they are fed in (chunks can be split anywhere). Responses starting
+    with `eqwd:` are base64 encoded errors (`is_error` is set), and any other response is
+    passed through unchanged.
+    """
+
+    # the longest prefix
+    __PREFIX_LENGTH = len("eqwd:")
+
+    def __init__(self):
+        self.is_error = False
+
+        # `None` until the prefix was read, then "eqz:", "eqwd:" or "" (not encoded)
+        self.__prefix: Optional[str] = None
+        # base64 that could not be decoded yet (less than 4 characters or the padding)
+        self.__pending = b""
+        self.__decompressor = zlib.decompressobj(-15)
+
+    def __read_prefix(self) -> bytes:
+        data = self.__pending
+
+        for prefix in ("eqz:", "eqwd:"):
+            if data.startswith(prefix.encode()):
+                self.__prefix = prefix
+                self.__pending = b""
+                self.is_error = prefix == "eqwd:"
+                return data[len(prefix) :]
+
+        if len(data) < ResponseDecoder.__PREFIX_LENGTH and any(
+            prefix.encode().startswith(data) for prefix in ("eqz:", "eqwd:")
+        ):
+            # wait for the rest of the prefix
+            return b""
+
+        self.__prefix = ""
+        self.__pending = b""
+        return data
+
+    def __decode_base64(self, data: bytes) -> bytes:
+        data = self.__pending + data.translate(None, RequestData.ASCII_WHITESPACE)
+
+        # only the padding at the very end can be "=", keep it for `finish`
+        padding_start = data.find(b"=")
+        if padding_start == -1:
+            padding_start = len(data)
+        elif data[padding_start:].strip(b"="):
+            raise Base64DecodeError("Failed to decode response.")
+
+        end = padding_start - padding_start % 4
+        self.__pending = data[end:]
+
+        decoded = RequestData.chromium_base64_decode_bytes(data[:end])
         if decoded is None:
             raise Base64DecodeError("Failed to decode response.")
 
         return decoded
+
+    def __inflate(self, data: bytes) -> bytes:
+        if self.__prefix != "eqz:":
+            return data
+
+        try:
+            return self.__decompressor.decompress(data)
+        except zlib.error as e:
+            raise Base64DecodeError(f"Failed to inflate response: {e}")
+
+    def feed(self, chunk: Union[bytes, str]) -> bytes:
+        """Decode the next chunk of the response and return the output it completed."""
+
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+
+        if self.__prefix is None:
+            self.__pending += chunk
+            chunk = self.__read_prefix()
+
+        if not self.__prefix:
+            return chunk
+
+        return self.__inflate(self.__decode_base64(chunk))
+
+    def finish(self) -> bytes:
+        """Decode the end of the response, raises `Base64DecodeError` if it is invalid."""
+
+        if self.__prefix is None:
+            # a response shorter than a prefix
+            self.__prefix = ""
+            return self.__pending
+
+        if not self.__prefix:
+            return b""
+
+        decoded = RequestData.chromium_base64_decode_bytes(self.__pending)
+        self.__pending = b""
+        if decoded is None:
+            raise Base64DecodeError("Failed to decode response.")
+
+        output = self.__inflate(decoded)
+        if self.__prefix == "eqz:":
+            output += self.__decompressor.flush()
+            if not self.__decompressor.eof:
+                raise Base64DecodeError("Failed to inflate response: it is truncated")
+
+        return output
@@ -8,8 +8,8 @@ class CustomRequest(Module):
         self, url: str, method: str, data: str = "", headers: dict = {}
     ) -> Response:
         if method == "GET":
-            response = self.edupage.session.get(url, headers=headers)
+            response = self.edupage.transport.get(url, headers=headers)
         elif method == "POST":
-            response = self.edupage.session.post(url, data=data, headers=headers)
+            response = self.edupage.transport.post(url, data=data, headers=headers)
 
         return response
@@ -0,0 +1,62 @@
+import threading
+from typing import Optional
+
+from edupage_api.exceptions import MissingDataException
+from edupage_api.module import Module
+
+
+class DashboardTokens:
+    """Request tokens scraped from the dashboard page (`dashboard/eb.php`).
+
+    `gpid` is a page counter that the browser advances with every `/gcall` request,
+    so it is advanced locally instead of loading the page again.
+    """
+
+    def __init__(self, gpid: int, gsh: str, gsec_hash: Optional[str]):
+        self.gsh = gsh
+        self.gsec_hash = gsec_hash
+
+        self.__gpid = gpid
+        self.__lock = threading.Lock()
+
+    def next_gpid(self) -> int:
+        with self.__lock:
+            self.__gpid += 1
+            return self.__gpid
+
+
+class Dashboard(Module):
+    def __fetch_tokens(self) -> DashboardTokens:
+        request_url = (
+            f"https://{self.edupage.subdomain}.edupage.org/dashboard/eb.php?mode=ttday"
+        )
+        page = self.edupage.transport.get(request_url).text
+
+        try:
+            gpid = int(page.split("gpid=", 1)[1].split("&", 1)[0])
+            gsh = page.split("gsh=", 1)[1].split('"', 1)[0]
+        except (IndexError, ValueError):
+            raise MissingDataException(
+                "Failed to find request tokens on the dashboard page! (expired session?)"
+            )
+
+        gsec_hash = None
+        if "gsechash=" in page:
+            gsec_hash = page.split("gsechash=", 1)[1].split('"', 2)[1]
+
+        return DashboardTokens(gpid, gsh, gsec_hash)
+
+    def get_tokens(self) -> DashboardTokens:
+        """Get the cached dashboard tokens, loading the dashboard page if there are none."""
+
+        tokens = self.edupage.dashboard_tokens
+        if tokens is None:
+            tokens = self.__fetch_tokens()
+            self.edupage.dashboard_tokens = tokens
+
+        return tokens
+
+    def invalidate_tokens(self):
+        """Forget the cached tokens (after the server has rejected them)."""
+
+        self.edupage.dashboard_tokens = None
@@ -1,12 +1,77 @@
-from typing import Optional
+import threading
+from typing import Callable, Optional
 
-from edupage_api.module import Module, ModuleHelper
+from edupage_api.module import Module
+
+
+class EntityRegistry:
+    """Id -> object lookups for the entities of one DBI snapshot.
+
+    Every group (subjects, classes, teachers, ...) is built the first time it is needed
+    and then reused. Objects that can be created from several places (e.g. people) are
+    interned, so that each entity exists only once in memory.
+
+    A new registry is created whenever `edupage.data["dbi"]` is replaced (e.g. after
+    logging in again), so the cached objects never outlive their data.
+    """
+
+    def __init__(self, dbi: Optional[dict]):
+        self.dbi = dbi
+
+        self.__groups = {}
+        self.__objects = {}
+        self.__lock = threading.RLock()
+
+    def get_group(self, group_name: str, build: Callable[[], Optional[dict]]):
+        if group_name in self.__groups:
+            return self.__groups[group_name]
+
+        # building a group can need other groups (e.g. classes need teachers)
+        with self.__lock:
+            if group_name not in self.__groups:
+                self.__groups[group_name] = build()
+
+            return self.__groups[group_name]
+
+    def intern(self, group_name: str, key, build: Callable[[], object]):
+        """Get the single object for `key` in `group_name`, building it on first use."""
+
+        objects = self.__objects.get(group_name)
+        if objects is not None and key in objects:
+            return objects[key]
+
+        with self.__lock:
+            objects = self.__objects.setdefault(group_name, {})
+            if key not in objects:
+                objects[key] = build()
+
+            return objects[key]
+
+    def __getstate__(self):
+        return self.dbi, self.__groups, self.__objects
+
+    def __setstate__(self, state):
+        self.dbi, self.__groups, self.__objects = state
+        self.__lock = threading.RLock()
 
 
 class DbiHelper(Module):
-    def __get_dbi(self) -> dict:
+    def __get_dbi(self) -> Optional[dict]:
+        if self.edupage.data is None:
+            return None
+
         return self.edupage.data.get("dbi")
 
+    def get_registry(self) -> EntityRegistry:
+        dbi = self.__get_dbi()
+
+        registry = self.edupage.entity_registry
+        if registry is None or registry.dbi is not dbi:
+            registry = EntityRegistry(dbi)
+            self.edupage.entity_registry = registry
+
+        return registry
+
     def __get_item_group(self, item_group_name: str) -> Optional[dict]:
         dbi = self.__get_dbi()
         if dbi is None:
@@ -73,38 +138,84 @@ class DbiHelper(Module):
     def fetch_student_data(self, student_id: int) -> Optional[dict]:
         return self.__get_item_with_id("students", student_id)
 
-    def fetch_student_data_by_name(self, student_name: str) -> Optional[dict]:
-        item_group = self.__get_item_group("students")
+    def __find_data_by_name(self, item_group_name: str, name: str) -> Optional[str]:
+        item_group = self.__get_item_group(item_group_name)
+        if item_group is None:
+            return None
 
-        for student_id in item_group:
-            student_data = item_group.get(student_id)
-            if self.__get_full_name(student_data) in student_name:
-                student_data["id"] = student_id
-                return student_data
+        for item_id, item_data in item_group.items():
+            if self.__get_full_name(item_data) in name:
+                return item_id
 
-    def fetch_teacher_data_by_name(self, teacher_name: str) -> Optional[dict]:
-        item_group = self.__get_item_group("teachers")
+    def __get_data_with_id(self, item_group_name: str, item_id: Optional[str]):
+        if item_id is None:
+            return None
+
+        # return a copy, the dicts in `dbi` are shared by everything using this snapshot
+        item_data = self.__get_item_with_id(item_group_name, item_id)
+        return {**item_data, "id": item_id}
+
+    @staticmethod
+    def __normalize_name(name: str) -> str:
+        return " ".join(name.split()).casefold()
+
+    def __build_person_name_index(self) -> dict[str, tuple[str, str]]:
+        index = {}
+
+        # if a name is shared, teachers win over students and students over parents
+        for item_group_name in ("teachers", "students", "parents"):
+            item_group = self.__get_item_group(item_group_name) or {}
+
+            for item_id, item_data in item_group.items():
+                name = self.__normalize_name(self.__get_full_name(item_data))
+                index.setdefault(name, (item_group_name, item_id))
+
+        return index
+
+    def __find_person_by_name(self, name: str) -> Optional[tuple[str, str]]:
+        for item_group_name in ("teachers", "students", "parents"):
+            item_id = self.__find_data_by_name(item_group_name, name)
+            if item_id is not None:
+                return item_group_name, item_id
+
+    def fetch_student_data_by_name(self, student_name: str) -> Optional[dict]:
+        student_id = self.__find_data_by_name("students", student_name)
+        return self.__get_data_with_id("students", student_id)
 
-        for teacher_id in item_group:
-            teacher_data = item_group.get(teacher_id)
-            if self.__get_full_name(teacher_data) in teacher_name:
-                teacher_data["id"] = teacher_id
-                return teacher_data
+    def fetch_teacher_data_by_name(self, teacher_name: str) -> Optional[dict]:
+        teacher_id = self.__find_data_by_name("teachers", teacher_name)
+        return self.__get_data_with_id("teachers", teacher_id)
 
     def fetch_parent_data_by_name(self, parent_name: str) -> Optional[dict]:
-        item_group = self.__get_item_group("parents")
+        parent_id = self.__find_data_by_name("parents", parent_name)
+        return self.__get_data_with_id("parents", parent_id)
 
-        for parent_id in item_group:
-            parent_data = item_group.get(parent_id)
-            if self.__get_full_name(parent_data) in parent_name:
-                parent_data["id"] = parent_id
-                return parent_data
+    def get_person_name_index(self) -> dict[str, tuple[str, str]]:
+        return self.get_registry().get_group(
+            "person_names", self.__build_person_name_index
+        )
 
     def fetch_person_data_by_name(self, name: str) -> Optional[dict]:
-        teacher_data = self.fetch_teacher_data_by_name(name)
-        student_data = self.fetch_student_data_by_name(name)
-        parent_data = self.fetch_parent_data_by_name(name)
+        if not isinstance(name, str):
+            return None
 
-        return ModuleHelper.return_first_not_null(
-            teacher_data, student_data, parent_data
-        )
+        registry = self.get_registry()
+
+        person = self.get_person_name_index().get(self.__normalize_name(name))
+
+        if person is None:
+            # names that are not exactly a full name (e.g. with a suffix) are matched
+            # by a slow scan, remember the results (and misses) for the next lookup
+            slow_matches = registry.get_group("person_name_slow_matches", dict)
+
+            if name in slow_matches:
+                person = slow_matches[name]
+            else:
+                person = self.__find_person_by_name(name)
+                slow_matches[name] = person
+
+        if person is None:
+            return None
+
+        item_group_name, item_id = person
+        return self.__get_data_with_id(item_group_name, item_id)
@@ -43,7 +43,7 @@ class Grades(Module):
 
     def __get_grade_data(self):
         request_url = f"https://{self.edupage.subdomain}.edupage.org/znamky/"
-        response = self.edupage.session.get(request_url).content.decode()
+        response = self.edupage.transport.get(request_url).content.decode()
 
         try:
             return self.__parse_grade_data(response)
@@ -52,7 +52,7 @@ class Grades(Module):
 
     def __get_grade_data_for_term(self, term: Term, year: int):
         request_url = f"https://{self.edupage.subdomain}.edupage.org/znamky/?what=studentviewer&znamky_yearid={year}&nadobdobie={term.value}"
-        response = self.edupage.session.post(request_url).content.decode()
+        response = self.edupage.transport.post(request_url).content.decode()
 
         try:
             return self.__parse_grade_data(response)
@@ -1,6 +1,5 @@
 import json
 from dataclasses import dataclass
-from json import JSONDecodeError
 from typing import Optional
 
 from edupage_api.exceptions import (
@@ -11,6 +10,7 @@ from edupage_api.exceptions import (
     SecondFactorFailedException,
 )
 from edupage_api.module import EdupageModule, Module
+from edupage_api.snapshot import DbiSnapshots
 
 
 @dataclass
@@ -32,7 +32,7 @@ class TwoFactorLogin:
         """
 
         request_url = f"https://{self.__edupage.subdomain}.edupage.org/login/twofactor?akcia=checkIfConfirmed"
-        response = self.__edupage.session.post(request_url)
+        response = self.__edupage.transport.post(request_url)
 
         data = response.json()
         if data.get("status") == "fail":
@@ -50,7 +50,7 @@ class TwoFactorLogin:
         """Resends the confirmation notification to all devices."""
 
         request_url = f"https://{self.__edupage.subdomain}.edupage.org/login/twofactor?akcia=resendNotifs"
-        response = self.__edupage.session.post(request_url)
+        response = self.__edupage.transport.post(request_url)
 
         data = response.json()
         if data.get("status") != "ok":
@@ -69,10 +69,10 @@ class TwoFactorLogin:
             "au": self.__authentication_token,
         }
 
-        response = self.__edupage.session.post(request_url, parameters)
+        response = self.__edupage.transport.post(request_url, parameters)
 
         if "window.location = gu;" in response.text:
-            cookies = self.__edupage.session.cookies.get_dict(
+            cookies = self.__edupage.transport.cookies.get_dict(
                 f"{self.__edupage.subdomain}.edupage.org"
             )
 
@@ -120,19 +120,30 @@ class TwoFactorLogin:
 
 
 class Login(Module):
+    @staticmethod
+    def __find_value(data: str, prefix: str, end: str) -> str:
+        # slice out only the value, `split` would copy the whole (multi-megabyte) page
+        start = data.index(prefix) + len(prefix)
+        return data[start : data.index(end, start)]
+
     def __parse_login_data(self, data):
-        json_string = (
-            data.split("userhome(", 1)[1]
-            .rsplit(");", 2)[0]
-            .replace("\t", "")
-            .replace("\n", "")
-            .replace("\r", "")
+        # decode the userhome object in place, without slicing it out of the page first;
+        # non-strict mode accepts the raw tabs and newlines the page can contain in strings
+        json_start = json.decoder.WHITESPACE.match(
+            data, data.index("userhome(") + len("userhome(")
+        ).end()
+        self.edupage.data, _ = json.JSONDecoder(strict=False).raw_decode(
+            data, json_start
         )
 
-        self.edupage.data = json.loads(json_string)
         self.edupage.is_logged_in = True
+        self.edupage.dashboard_tokens = None
+
+        self.edupage.gsec_hash = Login.__find_value(data, 'ASC.gsechash="', '"')
+
+        self.edupage.transport.prewarm(f"https://{self.edupage.subdomain}.edupage.org/")
 
-        self.edupage.gsec_hash = data.split('ASC.gsechash="')[1].split('"')[0]
+        DbiSnapshots(self.edupage).restore()
 
     def login(
         self, username: str, password: str, subdomain: str = "login1"
@@ -163,7 +174,7 @@ class Login(Module):
 
         request_url = f"https://{subdomain}.edupage.org/login/?cmd=MainLogin"
 
-        response = self.edupage.session.get(request_url)
+        response = self.edupage.transport.get(request_url)
         data = response.content.decode()
 
         csrf_token = data.split('"csrftoken":"')[1].split('"')[0]
@@ -176,7 +187,7 @@ class Login(Module):
 
         request_url = f"https://{subdomain}.edupage.org/login/edubarLogin.php"
 
-        response = self.edupage.session.post(request_url, parameters)
+        response = self.edupage.transport.post(request_url, parameters)
 
         if "cap=1" in response.url or "lerr=b43b43" in response.url:
             raise CaptchaException()
@@ -187,7 +198,9 @@ class Login(Module):
         data = response.content.decode()
 
         if subdomain == "login1":
-            subdomain = data.split("-->")[0].split(" ")[-1]
+            comment_end = data.find("-->")
+            header = data if comment_end == -1 else data[:comment_end]
+            subdomain = header.rsplit(" ", 1)[-1]
 
         self.edupage.subdomain = subdomain
         self.edupage.username = username
@@ -201,7 +214,7 @@ class Login(Module):
             f"https://{self.edupage.subdomain}.edupage.org/login/twofactor?sn=1"
         )
 
-        two_factor_response = self.edupage.session.get(request_url)
+        two_factor_response = self.edupage.transport.get(request_url)
 
         data = two_factor_response.content.decode()
 
@@ -217,13 +230,13 @@ class Login(Module):
     def reload_data(self, subdomain: str, session_id: str, username: str):
         request_url = f"https://{subdomain}.edupage.org/user"
 
-        self.edupage.session.cookies.set("PHPSESSID", session_id)
+        self.edupage.transport.cookies.set("PHPSESSID", session_id)
 
-        response = self.edupage.session.get(request_url)
+        response = self.edupage.transport.get(request_url)
 
         try:
-            self.__parse_login_data(response.content.decode())
             self.edupage.subdomain = subdomain
             self.edupage.username = username
-        except (TypeError, JSONDecodeError) as e:
+            self.__parse_login_data(response.content.decode())
+        except (TypeError, ValueError) as e:
             raise BadCredentialsException(f"Invalid session id: {e}")
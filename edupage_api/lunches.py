@@ -39,7 +39,7 @@ class Rating:
             "mnozstvo": str(quantity),
         }
 
-        response = edupage.session.post(request_url, data=data)
+        response = edupage.transport.post(request_url, data=data)
         parsed_response = json.loads(response.content.decode())
 
         error = parsed_response.get("error")
@@ -94,7 +94,7 @@ class Meal:
             "jedlaStravnika": json.dumps(boarder_menu),
         }
 
-        response = edupage.session.post(
+        response = edupage.transport.post(
             request_url, data=data
         ).content.decode()
 
@@ -214,7 +214,7 @@ class Lunches(Module):
     def get_meals(self, date: date) -> Optional[Meals]:
         date_strftime = date.strftime("%Y%m%d")
         request_url = f"https://{self.edupage.subdomain}.edupage.org/menu/?date={date_strftime}"
-        response = self.edupage.session.get(request_url).content.decode()
+        response = self.edupage.transport.get(request_url).content.decode()
 
         lunch_data = json.loads(
             response.split("edupageData: ")[1].split(",\r\n")[0]
@@ -37,7 +37,7 @@ class Messages(Module):
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
         request_url = f"https://{self.edupage.subdomain}.edupage.org/timeline/?=&akcia=createItem&eqav=1&maxEqav=7"
-        response = self.edupage.session.post(request_url, data=data, headers=headers)
+        response = self.edupage.transport.post(request_url, data=data, headers=headers)
 
         response_text = RequestData.decode_response(response.text)
         if response_text == "0":
@@ -1,8 +1,8 @@
 import urllib.parse
-from datetime import datetime
+from datetime import date, datetime, time
 from enum import Enum
-from functools import wraps
-from typing import Optional
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING, Optional, Union
 
 import requests
 
@@ -13,14 +13,29 @@ from edupage_api.exceptions import (
     NotParentException,
 )
 
+if TYPE_CHECKING:
+    from edupage_api.dashboard import DashboardTokens
+    from edupage_api.dbi import EntityRegistry
+    from edupage_api.snapshot import DbiSnapshot, DbiSnapshotStore
+    from edupage_api.timeline_store import TimelineStore
+    from edupage_api.transport import Transport
+
 
 class EdupageModule:
     subdomain: str
+    transport: "Transport"
+    # the same object as `transport`
     session: requests.Session
     data: dict
     is_logged_in: bool
     gsec_hash: str
     username: str
+    entity_registry: Optional["EntityRegistry"]
+    dashboard_tokens: Optional["DashboardTokens"]
+    dbi_snapshot_store: Optional["DbiSnapshotStore"]
+    dbi_snapshot: Optional["DbiSnapshot"]
+    timeline_store: Optional["TimelineStore"]
+    compress_timeline_requests: bool
 
 
 class Module:
@@ -48,13 +63,22 @@ class ModuleHelper:
             raise MissingDataException()
 
     @staticmethod
-    def parse_enum(string: str, enum_type: Enum):
-        filtered = list(filter(lambda x: x.value == string, list(enum_type)))
+    @lru_cache(maxsize=None)
+    def get_enum_values(enum_type: Enum) -> dict:
+        # aliases share the value of the first member, which is the one returned
+        values = {}
+        for member in enum_type:
+            values.setdefault(member.value, member)
 
-        if not filtered:
-            return None
+        return values
 
-        return filtered[0]
+    @staticmethod
+    def parse_enum(string: str, enum_type: Enum):
+        try:
+            return ModuleHelper.get_enum_values(enum_type).get(string)
+        except TypeError:
+            # unhashable value
+            return None
 
     @staticmethod
     def return_first_not_null(*args):
@@ -76,6 +100,27 @@ class ModuleHelper:
             output += f"&{entry}" if i != 0 else entry
         return output
 
+    @staticmethod
+    def parse_timestamp(timestamp: str) -> datetime:
+        """Parse a `%Y-%m-%d %H:%M:%S` timestamp, a lot faster than `datetime.strptime`."""
+
+        if len(timestamp) != 19 or timestamp[10] != " ":
+            raise ValueError(f"Invalid timestamp: {timestamp!r}")
+
+        return datetime.fromisoformat(timestamp)
+
+    @staticmethod
+    def format_timestamp_bound(bound: Union[date, datetime]) -> str:
+        """Format a date (its midnight) or a datetime as a `%Y-%m-%d %H:%M:%S` timestamp.
+
+        Timestamps in this format compare the same way as strings and as datetimes.
+        """
+
+        if not isinstance(bound, datetime):
+            bound = datetime.combine(bound, time())
+
+        return bound.strftime("%Y-%m-%d %H:%M:%S")
+
     @staticmethod
     def strptime_or_none(date_string: str, format: str) -> Optional[datetime]:
         try:
@@ -0,0 +1,201 @@
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from edupage_api.classrooms import Classroom, Classrooms
+from edupage_api.module import Module, ModuleHelper
+from edupage_api.timetables import Timetables
+
+
+class RoomOccupancy:
+    """Occupancy of all classrooms of a school for a range of dates.
+
+    Every (classroom, date) pair is stored as an integer bitmap with bit `p` set when the
+    classroom is occupied in period `p` (the lesson's `uniperiod`). Every (date, period) pair
+    is also stored the other way around, with bit `i` set when `classrooms[i]` is occupied.
+    Queries only combine these bitmaps and do not send any requests.
+
+    The occupancy of a classroom whose timetable could not be loaded (see `errors`) is unknown:
+    it is never returned as free, and queries about it return `None`.
+    """
+
+    def __init__(
+        self,
+        classrooms: list[Classroom],
+        date_from: date,
+        date_to: date,
+        periods: list[int],
+        room_bitmaps: dict[tuple[int, date], int],
+        errors: list[tuple[Classroom, Exception]],
+        school_days: Optional[list[date]] = None,
+    ):
+        self.classrooms = classrooms
+        self.date_from = date_from
+        self.date_to = date_to
+        self.periods = periods
+        # classrooms whose timetable could not be loaded (their occupancy is unknown)
+        self.errors = errors
+        # days with lessons in any classroom (weekends and holidays have none)
+        if school_days is None:
+            school_days = list(self.__get_days())
+        self.school_days = school_days
+
+        self.__room_bitmaps = room_bitmaps
+        self.__all_periods = 0
+        for period in periods:
+            self.__all_periods |= 1 << period
+
+        self.__classroom_bits = {
+            classroom.classroom_id: 1 << i for i, classroom in enumerate(classrooms)
+        }
+
+        self.__unknown_ids = {classroom.classroom_id for classroom, _ in errors}
+        self.__unknown_classrooms = 0
+        for classroom_id in self.__unknown_ids:
+            self.__unknown_classrooms |= self.__classroom_bits.get(classroom_id, 0)
+
+        self.__period_bitmaps = {}
+        for (classroom_id, day), bitmap in room_bitmaps.items():
+            classroom_bit = self.__classroom_bits.get(classroom_id, 0)
+            for period in periods:
+                if bitmap >> period & 1:
+                    key = (day, period)
+                    self.__period_bitmaps[key] = (
+                        self.__period_bitmaps.get(key, 0) | classroom_bit
+                    )
+
+    def __get_days(self):
+        for i in range((self.date_to - self.date_from).days + 1):
+            yield self.date_from + timedelta(days=i)
+
+    def __get_free_periods(self, classrooms: list[Classroom], day: date) -> int:
+        occupied = 0
+        for classroom in classrooms:
+            occupied |= self.__room_bitmaps.get((classroom.classroom_id, day), 0)
+
+        return self.__all_periods & ~occupied
+
+    def __is_unknown(self, classrooms: list[Classroom]) -> bool:
+        return any(classroom.classroom_id in self.__unknown_ids for classroom in classrooms)
+
+    def is_free(self, classroom: Classroom, day: date, period: int) -> Optional[bool]:
+        """Check if `classroom` is free in `period` of `day` (`None` if it is unknown)."""
+
+        if self.__is_unknown([classroom]):
+            return None
+
+        bitmap = self.__room_bitmaps.get((classroom.classroom_id, day), 0)
+        return not bitmap >> period & 1
+
+    def get_free_classrooms(self, day: date, period: int) -> list[Classroom]:
+        """Get the classrooms that are free in `period` of `day`.
+
+        Classrooms whose occupancy is unknown are left out.
+        """
+
+        occupied = self.__period_bitmaps.get((day, period), 0) | self.__unknown_classrooms
+
+        return [
+            classroom
+            for i, classroom in enumerate(self.classrooms)
+            if not occupied >> i & 1
+        ]
+
+    def get_free_periods(
+        self, classrooms: list[Classroom], day: date
+    ) -> Optional[list[int]]:
+        """Get the periods of `day` when all `classrooms` are free.
+
+        Returns `None` if the occupancy of any of the classrooms is unknown.
+        """
+
+        if self.__is_unknown(classrooms):
+            return None
+
+        free = self.__get_free_periods(classrooms, day)
+        return [period for period in self.periods if free >> period & 1]
+
+    def get_first_common_free_slot(
+        self,
+        classrooms: list[Classroom],
+        date_from: Optional[date] = None,
+        days: Optional[Iterable[date]] = None,
+    ) -> Optional[tuple[date, int]]:
+        """Get the first (day, period) when all `classrooms` are free.
+
+        Only `days` are considered, by default the `school_days`. Returns `None` if there is no
+        such slot or if the occupancy of any of the classrooms is unknown.
+        """
+
+        if self.__is_unknown(classrooms):
+            return None
+
+        if days is None:
+            days = self.school_days
+
+        for day in sorted(days):
+            if date_from is not None and day < date_from:
+                continue
+
+            free = self.__get_free_periods(classrooms, day)
+            if free:
+                # the lowest set bit is the first free period
+                return day, (free & -free).bit_length() - 1
+
+        return None
+
+
+class Occupancy(Module):
+    def __get_ringing_periods(self) -> list[int]:
+        ringing_times = self.edupage.data.get("zvonenia") or []
+
+        periods = []
+        for i, ringing_time in enumerate(ringing_times, start=1):
+            period = ModuleHelper.parse_int(
+                str(ringing_time.get("period") or ringing_time.get("id") or i)
+            )
+            periods.append(period if period is not None else i)
+
+        return periods
+
+    @ModuleHelper.logged_in
+    def get_room_occupancy(
+        self, date_from: date, date_to: date, max_workers: int = 8
+    ) -> RoomOccupancy:
+        classrooms = Classrooms(self.edupage).get_classrooms() or []
+
+        batch = Timetables(self.edupage).get_timetables(
+            classrooms, date_from, date_to, max_workers
+        )
+
+        periods = set(self.__get_ringing_periods())
+        room_bitmaps = {}
+        school_days = set()
+
+        for classroom, timetables in batch.timetables:
+            for day, timetable in timetables.items():
+                if timetable.lessons:
+                    school_days.add(day)
+
+                bitmap = 0
+
+                for lesson in timetable:
+                    if lesson.period is None or lesson.is_cancelled:
+                        continue
+
+                    duration = int(lesson.duration or 1)
+                    for period in range(lesson.period, lesson.period + duration):
+                        bitmap |= 1 << period
+                        periods.add(period)
+
+                if bitmap:
+                    room_bitmaps[(classroom.classroom_id, day)] = bitmap
+
+        return RoomOccupancy(
+            classrooms,
+            date_from,
+            date_to,
+            sorted(periods),
+            room_bitmaps,
+            batch.errors,
+            sorted(school_days),
+        )
@@ -12,7 +12,7 @@ class Parent(Module):
         params = {"studentid": child.person_id if type(child) == EduAccount else child}
 
         url = f"https://{self.edupage.subdomain}.edupage.org/login/switchchild"
-        response = self.edupage.session.get(url, params=params)
+        response = self.edupage.transport.get(url, params=params)
 
         if response.text != "OK":
             raise InvalidChildException(
@@ -28,7 +28,7 @@ class Parent(Module):
         params = {"rid": rid}
 
         url = f"https://{self.edupage.subdomain}.edupage.org/login/edupageChange"
-        response = self.edupage.session.get(url, params=params)
+        response = self.edupage.transport.get(url, params=params)
 
         if "EdupageLoginFailed" in response.url:
             raise UnknownServerError()
@@ -1,6 +1,7 @@
 # For postponed evaluation of annotations
 from __future__ import annotations
 
+import copy
 import json
 from dataclasses import dataclass
 from datetime import datetime
@@ -28,6 +29,8 @@ class EduAccountType(str, Enum):
 
 @dataclass
 class EduAccount:
+    __slots__ = ("person_id", "name", "gender", "in_school_since", "account_type")
+
     person_id: int
     name: str
     gender: Gender
@@ -48,7 +51,31 @@ class EduAccount:
         person_data: dict, person_id: int, edupage: EdupageModule
     ) -> Optional[EduAccount]:
         account_type = EduAccount.recognize_account_type(person_data)
+        if account_type == EduAccountType.PARENT:
+            return None
 
+        person_id = int(person_id)
+
+        # every person is parsed only once per DBI snapshot, all references share the object
+        return (
+            DbiHelper(edupage)
+            .get_registry()
+            .intern(
+                account_type.value,
+                person_id,
+                lambda: EduAccount.__parse(
+                    person_data, person_id, account_type, edupage
+                ),
+            )
+        )
+
+    @staticmethod
+    def __parse(
+        person_data: dict,
+        person_id: int,
+        account_type: EduAccountType,
+        edupage: EdupageModule,
+    ) -> Optional[EduAccount]:
         if account_type == EduAccountType.STUDENT:
             class_id = ModuleHelper.parse_int(person_data.get("classid"))
             name = DbiHelper(edupage).fetch_student_name(person_id)
@@ -92,6 +119,8 @@ class EduAccount:
 
 @dataclass
 class EduStudent(EduAccount):
+    __slots__ = ("class_id", "number_in_class", "__student_only")
+
     def __init__(
         self,
         person_id: int,
@@ -116,12 +145,38 @@ class EduStudent(EduAccount):
         else:
             return super().get_id().replace("Student", "StudentOnly")
 
+    def as_student_only(self, student_only: bool = True) -> EduStudent:
+        """Get a copy of this student whose id refers only to the student (not the parents).
+
+        Students are shared by everything parsed from the same DBI, so this object is not
+        changed: use the returned student.
+        """
+
+        student = copy.copy(self)
+        student.__student_only = student_only
+        return student
+
     def set_student_only(self, student_only: bool):
-        self.__student_only = student_only
+        """Removed, use `as_student_only` and the student it returns.
+
+        Students are shared by everything parsed from the same DBI, so changing this one would
+        change it everywhere. It cannot be changed in place anymore, and silently ignoring the
+        call would send messages meant for the student only to the parents too.
+
+        Raises:
+            RuntimeError: Always.
+        """
+
+        raise RuntimeError(
+            "EduStudent.set_student_only cannot change a shared student, "
+            "use `student = student.as_student_only()` instead"
+        )
 
 
 @dataclass
 class EduStudentSkeleton:
+    __slots__ = ("person_id", "name_short", "class_id")
+
     person_id: int
     name_short: str
     class_id: int
@@ -129,6 +184,8 @@ class EduStudentSkeleton:
 
 @dataclass
 class EduParent(EduAccount):
+    __slots__ = ()
+
     def __init__(
         self,
         person_id: int,
@@ -143,6 +200,8 @@ class EduParent(EduAccount):
 
 @dataclass
 class EduTeacher(EduAccount):
+    __slots__ = ("teacher_to", "classroom_name")
+
     def __init__(
         self,
         person_id: int,
@@ -161,25 +220,44 @@ class EduTeacher(EduAccount):
 
 
 class People(Module):
-    @ModuleHelper.logged_in
-    def get_students(self) -> Optional[list]:
-        students = DbiHelper(self.edupage).fetch_student_list()
-        if students is None:
+    def __build_people(self, people: Optional[dict]) -> Optional[dict]:
+        if people is None:
             return None
 
-        result = []
-        for student_id_str in students:
-            if not student_id_str:
+        result = {}
+        for person_id_str in people:
+            if not person_id_str:
                 continue
 
-            student_id = int(student_id_str)
-            student_data = students.get(student_id_str)
+            person_id = int(person_id_str)
+            person_data = people.get(person_id_str)
 
-            student = EduAccount.parse(student_data, student_id, self.edupage)
-            result.append(student)
+            result[person_id] = EduAccount.parse(person_data, person_id, self.edupage)
 
         return result
 
+    def __get_students_by_id(self) -> Optional[dict[int, EduStudent]]:
+        dbi = DbiHelper(self.edupage)
+
+        return dbi.get_registry().get_group(
+            "students", lambda: self.__build_people(dbi.fetch_student_list())
+        )
+
+    def __get_teachers_by_id(self) -> Optional[dict[int, EduTeacher]]:
+        dbi = DbiHelper(self.edupage)
+
+        return dbi.get_registry().get_group(
+            "teachers", lambda: self.__build_people(dbi.fetch_teacher_list())
+        )
+
+    @ModuleHelper.logged_in
+    def get_students(self) -> Optional[list]:
+        students = self.__get_students_by_id()
+        if students is None:
+            return None
+
+        return list(students.values())
+
     @ModuleHelper.logged_in
     def get_all_students(self) -> Optional[list[EduStudent]]:
         request_url = f"https://{self.edupage.subdomain}.edupage.org/rpr/server/maindbi.js?__func=mainDBIAccessor"
@@ -198,7 +276,7 @@ class People(Module):
             "__gsh": self.edupage.gsec_hash,
         }
 
-        response = self.edupage.session.post(request_url, json=data).content.decode()
+        response = self.edupage.transport.post(request_url, json=data).content.decode()
         students = json.loads(response).get("r").get("tables")[0].get("data_rows")
 
         result = []
@@ -221,14 +299,11 @@ class People(Module):
         except (ValueError, TypeError):
             return None
 
-        return next(
-            (
-                teacher
-                for teacher in self.get_teachers()
-                if teacher.person_id == teacher_id
-            ),
-            None,
-        )
+        teachers = self.__get_teachers_by_id()
+        if teachers is None:
+            return None
+
+        return teachers.get(teacher_id)
 
     @ModuleHelper.logged_in
     def get_student(self, student_id: Union[int, str]) -> Optional[EduStudent]:
@@ -237,30 +312,16 @@ class People(Module):
         except (ValueError, TypeError):
             return None
 
-        return next(
-            (
-                student
-                for student in self.get_students()
-                if student.person_id == student_id
-            ),
-            None,
-        )
+        students = self.__get_students_by_id()
+        if students is None:
+            return None
+
+        return students.get(student_id)
 
     @ModuleHelper.logged_in
     def get_teachers(self) -> Optional[list]:
-        teachers = DbiHelper(self.edupage).fetch_teacher_list()
+        teachers = self.__get_teachers_by_id()
         if teachers is None:
             return None
 
-        result = []
-        for teacher_id_str in teachers:
-            if not teacher_id_str:
-                continue
-
-            teacher_id = int(teacher_id_str)
-            teacher_data = teachers.get(teacher_id_str)
-
-            teacher = EduAccount.parse(teacher_data, teacher_id, self.edupage)
-            result.append(teacher)
-
-        return result
+        return list(teachers.values())
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from edupage_api.classes import Classes
+from edupage_api.classrooms import Classrooms
+from edupage_api.dbi import DbiHelper, EntityRegistry
+from edupage_api.module import Module
+from edupage_api.people import People
+from edupage_api.subjects import Subjects
+
+
+@dataclass
+class DbiSnapshot:
+    subdomain: str
+    year: int
+    user_id: str
+    # the newest `h_cleardbi` timeline event this snapshot already reflects
+    cleardbi_id: int
+    # hash of the DBI the snapshot was built from
+    fingerprint: str
+    registry: EntityRegistry
+
+
+class DbiSnapshotStore:
+    """On-disk store of DBI snapshots (the school directory with all its lookups built).
+
+    A snapshot is saved after a login and used by the following logins of the same account
+    in the same school year, so that other processes do not have to rebuild the directory.
+    It is only used if the directory downloaded by the login is the same as the one the
+    snapshot was built from, otherwise it is replaced. A snapshot is also dropped when the
+    timeline reports that the directory was changed (`EventType.H_CLEARDBI`). Like without a
+    store, changes made after a login are seen only after the next login.
+
+    A snapshot that cannot be loaded (e.g. written by another version) is ignored, and a
+    snapshot that cannot be saved is skipped, the login does not fail because of the store.
+
+    Snapshots are stored with `pickle`, only use a directory nobody else can write to.
+    """
+
+    VERSION = 2
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def __get_path(self, subdomain: str, year: int, user_id: str) -> str:
+        return os.path.join(self.directory, f"{subdomain}-{year}-{user_id}.dbi")
+
+    def load(self, subdomain: str, year: int, user_id: str) -> Optional[DbiSnapshot]:
+        try:
+            with open(self.__get_path(subdomain, year, user_id), "rb") as f:
+                version, snapshot = pickle.load(f)
+        except Exception:
+            # missing, damaged, or pickled by a version with different classes
+            return None
+
+        if version != DbiSnapshotStore.VERSION:
+            return None
+
+        return snapshot
+
+    def save(self, snapshot: DbiSnapshot):
+        os.makedirs(self.directory, exist_ok=True)
+
+        # write to a temporary file first, so that other processes never load half a snapshot
+        fd, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    (DbiSnapshotStore.VERSION, snapshot),
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+
+            os.replace(
+                temporary_path,
+                self.__get_path(snapshot.subdomain, snapshot.year, snapshot.user_id),
+            )
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def invalidate(self, subdomain: str, year: int, user_id: str):
+        try:
+            os.remove(self.__get_path(subdomain, year, user_id))
+        except FileNotFoundError:
+            pass
+
+
+class DbiSnapshots(Module):
+    @staticmethod
+    def __get_fingerprint(dbi: Optional[dict]) -> str:
+        # a few milliseconds even for big schools, building the registry takes much longer
+        encoded = json.dumps(dbi, separators=(",", ":")).encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def __get_cleardbi_id(self) -> int:
+        cleardbi_ids = [
+            int(item.get("timelineid"))
+            for item in self.edupage.data.get("items") or []
+            if item.get("typ") == "h_cleardbi" and item.get("timelineid")
+        ]
+
+        return max(cleardbi_ids, default=0)
+
+    def __build_registry(self) -> EntityRegistry:
+        registry = DbiHelper(self.edupage).get_registry()
+
+        People(self.edupage).get_teachers()
+        People(self.edupage).get_students()
+        Classrooms(self.edupage).get_classrooms()
+        Subjects(self.edupage).get_subjects()
+        Classes(self.edupage).get_classes()
+        DbiHelper(self.edupage).get_person_name_index()
+
+        return registry
+
+    def restore(self):
+        """Use the stored snapshot for the logged-in account, or store a new one."""
+
+        store = self.edupage.dbi_snapshot_store
+        if store is None:
+            return
+
+        subdomain = self.edupage.subdomain
+        year = (self.edupage.data.get("dp") or {}).get("year")
+        user_id = self.edupage.get_user_id()
+        cleardbi_id = self.__get_cleardbi_id()
+        fingerprint = DbiSnapshots.__get_fingerprint(self.edupage.data.get("dbi"))
+
+        snapshot = store.load(subdomain, year, user_id)
+        if (
+            snapshot is not None
+            and snapshot.cleardbi_id >= cleardbi_id
+            and snapshot.fingerprint == fingerprint
+        ):
+            self.edupage.data["dbi"] = snapshot.registry.dbi
+            self.edupage.entity_registry = snapshot.registry
+        else:
+            snapshot = DbiSnapshot(
+                subdomain,
+                year,
+                user_id,
+                cleardbi_id,
+                fingerprint,
+                self.__build_registry(),
+            )
+
+            try:
+                store.save(snapshot)
+            except Exception:
+                # the store is only a cache, the next login builds the directory again
+                pass
+
+        self.edupage.dbi_snapshot = snapshot
+
+    def clear_dbi(self, timeline_id: int):
+        """Drop the stored snapshot if the `h_cleardbi` event `timeline_id` is newer than it."""
+
+        store = self.edupage.dbi_snapshot_store
+        snapshot = self.edupage.dbi_snapshot
+        if store is None or snapshot is None or timeline_id <= snapshot.cleardbi_id:
+            return
+
+        try:
+            store.invalidate(snapshot.subdomain, snapshot.year, snapshot.user_id)
+        except OSError:
+            # the next login still sees that the directory has changed
+            pass
+
+        self.edupage.dbi_snapshot = None
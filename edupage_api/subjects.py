@@ -7,46 +7,60 @@ from edupage_api.module import Module, ModuleHelper
 
 @dataclass
 class Subject:
+    __slots__ = ("subject_id", "name", "short")
+
     subject_id: int
     name: str
     short: str
 
 
 class Subjects(Module):
-    @ModuleHelper.logged_in
-    def get_subjects(self) -> Optional[list]:
+    def __build_subjects(self) -> Optional[dict[int, Subject]]:
         subject_list = DbiHelper(self.edupage).fetch_subject_list()
 
         if subject_list is None:
             return None
 
-        subjects = []
+        subjects = {}
 
         for subject_id_str in subject_list:
             if not subject_id_str:
                 continue
 
-            subjects.append(
-                Subject(
-                    int(subject_id_str),
-                    subject_list[subject_id_str]["name"],
-                    subject_list[subject_id_str]["short"],
-                )
+            subject_id = int(subject_id_str)
+            subjects[subject_id] = Subject(
+                subject_id,
+                subject_list[subject_id_str]["name"],
+                subject_list[subject_id_str]["short"],
             )
 
         return subjects
 
+    def __get_subjects_by_id(self) -> Optional[dict[int, Subject]]:
+        return (
+            DbiHelper(self.edupage)
+            .get_registry()
+            .get_group("subjects", self.__build_subjects)
+        )
+
+    @ModuleHelper.logged_in
+    def get_subjects(self) -> Optional[list]:
+        subjects = self.__get_subjects_by_id()
+
+        if subjects is None:
+            return None
+
+        return list(subjects.values())
+
     def get_subject(self, subject_id: Union[int, str]) -> Optional[Subject]:
         try:
             subject_id = int(subject_id)
         except (ValueError, TypeError):
             return None
 
-        return next(
-            (
-                subject
-                for subject in self.get_subjects()
-                if subject.subject_id == subject_id
-            ),
-            None,
-        )
+        subjects = self.__get_subjects_by_id()
+
+        if subjects is None:
+            return None
+
+        return subjects.get(subject_id)
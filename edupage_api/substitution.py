@@ -42,7 +42,7 @@ class Substitution(Module):
             "__gsh": self.edupage.gsec_hash,
         }
 
-        response = self.edupage.session.post(url, json=data).content.decode()
+        response = self.edupage.transport.post(url, json=data).content.decode()
         response = json.loads(response)
 
         if response.get("reload"):
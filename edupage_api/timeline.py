@@ -2,14 +2,19 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
-from datetime import datetime, date
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
 from enum import Enum
-from typing import Optional, Union
+from typing import Iterable, Iterator, Optional, Union
 
+from edupage_api.compression import RequestData, ResponseDecoder
 from edupage_api.dbi import DbiHelper
 from edupage_api.module import Module, ModuleHelper
 from edupage_api.people import EduAccount
+from edupage_api.snapshot import DbiSnapshots
+from edupage_api.timeline_export import TimelineColumns
 from edupage_api.utils import RequestUtil
 from edupage_api.exceptions import RequestError, MissingDataException
 
@@ -160,55 +165,141 @@ class TimelineEvent:
     is_removed: bool = False
 
 
+class RawJson(str):
+    """The JSON text of a value that was not decoded yet."""
+
+
+class LazyJsonAttribute:
+    """An attribute that decodes a `RawJson` value on first access and keeps the result."""
+
+    def __init__(self, name: str):
+        self.__name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        value = instance.__dict__.get(self.__name)
+        if type(value) is RawJson:
+            value = json.loads(value)
+            instance.__dict__[self.__name] = value
+
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.__name] = value
+
+    def get_json(self, instance) -> str:
+        """Get the value as JSON, without decoding it if it was not decoded yet."""
+
+        value = instance.__dict__.get(self.__name)
+        if type(value) is RawJson:
+            return value
+
+        return json.dumps(value, ensure_ascii=False)
+
+
+# events parsed with `lazy_data=True` keep the raw JSON of `additional_data`
+TimelineEvent.additional_data = LazyJsonAttribute(  # pyright: ignore[reportAttributeAccessIssue]
+    "additional_data"
+)
+
+
+@dataclass
+class TimelineCursor:
+    """Where an incremental sync (`TimelineEvents.sync_notifications`) stopped."""
+
+    # the newest timeline id that was seen
+    timeline_id: int = 0
+    # the newest creation time (`cas_pridania`) that was seen
+    created_at: Optional[datetime] = None
+    # the raw user props (starred, done state) by timeline id
+    user_props: dict = field(default_factory=dict)
+    # ids of the seen events that are removed
+    removed_ids: set = field(default_factory=set)
+    # the day of the first sync, the history is downloaded since then while no event
+    # (and so no `created_at`) was seen yet
+    started_at: date = field(default_factory=date.today)
+
+
+@dataclass
+class TimelineSync:
+    # events newer than the cursor
+    new_events: list[TimelineEvent]
+    # already seen events whose done, starred or removed state has changed
+    changed_events: list[TimelineEvent]
+    # pass this cursor to the next sync
+    cursor: TimelineCursor
+
+
 class TimelineEvents(Module):
-    def __parse_items(
-        self, timeline_items: dict, user_props: Optional[dict] = None
-    ) -> list[TimelineEvent]:
-        output = []
+    @staticmethod
+    def __is_text_in_data(text: str) -> bool:
+        return text == "" or text.startswith("Dôležitá správa")
 
+    @staticmethod
+    def __get_text(text: str, additional_data) -> str:
+        # what about different languages?
+        # for message event type
+        if text.startswith("Dôležitá správa"):
+            text = additional_data.get("messageContent")
+
+        if text == "":
+            try:
+                text = additional_data.get("nazov")
+            except:
+                text = ""
+
+        return text
+
+    def __iter_parsed_items(
+        self,
+        timeline_items: Iterable[dict],
+        user_props: Optional[dict] = None,
+        lazy_data: bool = False,
+    ) -> Iterator[TimelineEvent]:
         if user_props is None:
             user_props = {}
 
+        dbi = DbiHelper(self.edupage)
+
         for event in timeline_items:
             event_id_str = event.get("timelineid")
             if not event_id_str:
                 continue
 
             event_id = int(event_id_str)
-            event_data = json.loads(event.get("data"))
 
-            event_type_str = event.get("typ")
-            if not event_id_str:
-                continue
-            event_type = EventType.parse(event_type_str)
+            event_type = EventType.parse(event.get("typ"))
+
+            if event_type == EventType.H_CLEARDBI:
+                DbiSnapshots(self.edupage).clear_dbi(event_id)
+
+            event_timestamp = ModuleHelper.parse_timestamp(event.get("timestamp"))
 
-            event_timestamp = datetime.strptime(
-                event.get("timestamp"), "%Y-%m-%d %H:%M:%S"
-            )
             text = event.get("text")
 
-            # what about different languages?
-            # for message event type
-            if text.startswith("Dôležitá správa"):
-                text = event_data.get("messageContent")
+            # decoded only once, it is used both for the text and as `additional_data`
+            additional_data = event.get("data")
+            if additional_data and type(additional_data) == str:
+                # in lazy mode, it is only decoded here if the text needs it
+                if lazy_data and not TimelineEvents.__is_text_in_data(text):
+                    additional_data = RawJson(additional_data)
+                else:
+                    additional_data = json.loads(additional_data)
 
-            if text == "":
-                try:
-                    text = event_data.get("nazov")
-                except:
-                    text = ""
+            text = TimelineEvents.__get_text(text, additional_data)
 
             # todo: add support for "*"
+            # the names are only looked up if they are not plain strings
             recipient_name = event.get("user_meno")
-            recipient_data = DbiHelper(self.edupage).fetch_person_data_by_name(
-                recipient_name
-            )
 
             if recipient_name in ["*", "Celá škola"]:
                 recipient = "*"
             elif type(recipient_name) == str:
                 recipient = recipient_name
             else:
+                recipient_data = dbi.fetch_person_data_by_name(recipient_name)
                 ModuleHelper.assert_none(recipient_data)
 
                 recipient = EduAccount.parse(
@@ -217,22 +308,19 @@ class TimelineEvents(Module):
 
             # todo: add support for "*"
             author_name = event.get("vlastnik_meno")
-            author_data = DbiHelper(self.edupage).fetch_person_data_by_name(author_name)
 
             if author_name == "*":
                 author = "*"
             elif type(author_name) == str:
                 author = author_name
             else:
+                author_data = dbi.fetch_person_data_by_name(author_name)
                 ModuleHelper.assert_none(author_data)
+
                 author = EduAccount.parse(
                     author_data, author_data.get("id"), self.edupage
                 )
 
-            additional_data = event.get("data")
-            if additional_data and type(additional_data) == str:
-                additional_data = json.loads(additional_data)
-
             # Parse user-specific state from userProps
             props = user_props.get(event_id_str, {})
             if not isinstance(props, dict):
@@ -244,7 +332,7 @@ class TimelineEvents(Module):
             done_at_str = props.get("doneMaxCas")
             if done_at_str:
                 try:
-                    done_at = datetime.strptime(done_at_str, "%Y-%m-%d %H:%M:%S")
+                    done_at = ModuleHelper.parse_timestamp(done_at_str)
                 except (ValueError, TypeError):
                     pass
             is_done = done_at is not None
@@ -260,9 +348,7 @@ class TimelineEvents(Module):
             created_at_str = event.get("cas_pridania")
             if created_at_str:
                 try:
-                    created_at = datetime.strptime(
-                        created_at_str, "%Y-%m-%d %H:%M:%S"
-                    )
+                    created_at = ModuleHelper.parse_timestamp(created_at_str)
                 except (ValueError, TypeError):
                     pass
 
@@ -283,9 +369,174 @@ class TimelineEvents(Module):
                 created_at=created_at,
                 is_removed=is_removed,
             )
-            output.append(event)
+            yield event
+
+    def __iter_items(
+        self,
+        timeline_items: Iterable[dict],
+        user_props: Optional[dict] = None,
+        lazy_data: bool = False,
+    ) -> Iterator[TimelineEvent]:
+        events = self.__iter_parsed_items(timeline_items, user_props, lazy_data)
+
+        store = self.edupage.timeline_store
+        if store is None:
+            return events
+
+        return store.write_through(
+            events, self.edupage.subdomain, self.edupage.get_user_id()
+        )
+
+    def __filter_items(
+        self,
+        timeline_items: Iterable[dict],
+        types: Optional[Iterable[EventType]],
+        since: Optional[Union[date, datetime]],
+        until: Optional[Union[date, datetime]],
+        include_removed: bool,
+    ) -> Iterable[dict]:
+        if types is None and since is None and until is None and include_removed:
+            return timeline_items
+
+        event_types = None
+        if types is not None:
+            event_types = {EventType(event_type).value for event_type in types}
+
+        # raw timestamps compare as strings, the events are filtered before they are parsed
+        since_str = None if since is None else ModuleHelper.format_timestamp_bound(since)
+        until_str = None if until is None else ModuleHelper.format_timestamp_bound(until)
+
+        def matches(event: dict) -> bool:
+            if event_types is not None and event.get("typ") not in event_types:
+                return False
+
+            if not include_removed and event.get("removed") == "1":
+                return False
+
+            if since_str is None and until_str is None:
+                return True
+
+            timestamp = event.get("timestamp")
+            if type(timestamp) != str:
+                return False
+
+            return (since_str is None or timestamp >= since_str) and (
+                until_str is None or timestamp < until_str
+            )
+
+        return filter(matches, timeline_items)
+
+    def __parse_items(
+        self,
+        timeline_items: Iterable[dict],
+        user_props: Optional[dict] = None,
+        lazy_data: bool = False,
+    ) -> list[TimelineEvent]:
+        return list(self.__iter_items(timeline_items, user_props, lazy_data))
+
+    def __build_columns(
+        self, timeline_items: Iterable[dict], user_props: dict, include_data: bool
+    ) -> TimelineColumns:
+        event_ids = array("q")
+        timestamps = array("q")
+        event_type_codes = array("i")
+        texts = []
+        author_codes = array("i")
+        recipient_codes = array("i")
+        reaction_counts = array("i")
+        is_starred = array("b")
+        is_done = array("b")
+        is_removed = array("b")
+        additional_data_column = [] if include_data else None
+
+        event_types = {}
+        authors = {}
+        recipients = {}
+
+        epoch = datetime(1970, 1, 1)
+        second = timedelta(seconds=1)
+
+        for event in timeline_items:
+            event_id_str = event.get("timelineid")
+            if not event_id_str:
+                continue
+
+            event_ids.append(int(event_id_str))
+
+            event_timestamp = ModuleHelper.parse_timestamp(event.get("timestamp"))
+            timestamps.append((event_timestamp - epoch) // second)
+
+            event_type_codes.append(
+                event_types.setdefault(event.get("typ"), len(event_types))
+            )
+
+            text = event.get("text")
+            additional_data = event.get("data")
+            if TimelineEvents.__is_text_in_data(text):
+                if additional_data and type(additional_data) == str:
+                    additional_data = json.loads(additional_data)
+
+                text = TimelineEvents.__get_text(text, additional_data)
+            texts.append(text)
+
+            if include_data:
+                if additional_data is not None and type(additional_data) != str:
+                    additional_data = json.dumps(additional_data, ensure_ascii=False)
+                additional_data_column.append(additional_data)
+
+            # the names are not resolved, only plain string names are exported
+            recipient_name = event.get("user_meno")
+            if recipient_name in ["*", "Celá škola"]:
+                recipient_name = "*"
+            elif type(recipient_name) != str:
+                recipient_name = None
+            recipient_codes.append(recipients.setdefault(recipient_name, len(recipients)))
+
+            author_name = event.get("vlastnik_meno")
+            if type(author_name) != str:
+                author_name = None
+            author_codes.append(authors.setdefault(author_name, len(authors)))
+
+            reaction_count = 0
+            try:
+                reaction_count = int(event.get("pocet_reakcii", 0))
+            except (ValueError, TypeError):
+                pass
+            reaction_counts.append(reaction_count)
+
+            props = user_props.get(event_id_str, {})
+            if not isinstance(props, dict):
+                props = {}
 
-        return output
+            is_starred.append(props.get("starred") == "1")
+
+            done_at = None
+            done_at_str = props.get("doneMaxCas")
+            if done_at_str:
+                try:
+                    done_at = ModuleHelper.parse_timestamp(done_at_str)
+                except (ValueError, TypeError):
+                    pass
+            is_done.append(done_at is not None)
+
+            is_removed.append(event.get("removed") == "1")
+
+        return TimelineColumns(
+            event_ids,
+            timestamps,
+            event_type_codes,
+            list(event_types),
+            texts,
+            author_codes,
+            list(authors),
+            recipient_codes,
+            list(recipients),
+            reaction_counts,
+            is_starred,
+            is_done,
+            is_removed,
+            additional_data_column,
+        )
 
     def __get_user_props(self) -> dict:
         """Get user properties (starred, done state) from cached login data."""
@@ -294,8 +545,44 @@ class TimelineEvents(Module):
         result = self.edupage.data.get("userProps")
         return result if isinstance(result, dict) else {}
 
-    @ModuleHelper.logged_in
-    def get_notifications_history(self, date_from: date):
+    def __post_compressed(self, request_url: str, params: list, form_data: dict):
+        # the same envelope as the web client: a compressed request body, and `eqav` and
+        # `maxEqav` to let the server send a compressed (`eqz:`) response
+        params = params + [("eqav", "1"), ("maxEqav", "7")]
+
+        with self.edupage.transport.post(
+            request_url,
+            params=params,
+            data=RequestData.encode_request_body(form_data),
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                raise RequestError(
+                    f"Edupage returned an error: status={response.status_code}"
+                )
+
+            # the response is decoded while it is downloaded
+            decoder = ResponseDecoder()
+            content = bytearray()
+            for chunk in response.iter_content(2**16):
+                content += decoder.feed(chunk)
+            content += decoder.finish()
+
+        if decoder.is_error:
+            raise RequestError(
+                f"Edupage returned an error: {content.decode(errors='replace')}"
+            )
+
+        return json.loads(content)
+
+    def __get_history_data(
+        self, date_from: date, date_to: Optional[date] = None
+    ) -> tuple[list, dict]:
+        form_data = {"datefrom": date_from.strftime("%Y-%m-%d")}
+        if date_to is not None:
+            form_data["dateto"] = date_to.strftime("%Y-%m-%d")
+
         request_url = f"https://{self.edupage.subdomain}.edupage.org/timeline/"
         params = [
             ("module", "todo"),
@@ -304,23 +591,23 @@ class TimelineEvents(Module):
             ("filterTab", "messages"),
         ]
 
-        response = self.edupage.session.post(
-            request_url,
-            params=params,
-            data=RequestUtil.encode_form_data(
-                {
-                    "datefrom": date_from.strftime("%Y-%m-%d"),
-                }
-            ),
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-
-        if response.status_code != 200:
-            raise RequestError(
-                f"Edupage returned an error: status={response.status_code}"
+        if self.edupage.compress_timeline_requests:
+            data = self.__post_compressed(request_url, params, form_data)
+        else:
+            response = self.edupage.transport.post(
+                request_url,
+                params=params,
+                data=RequestUtil.encode_form_data(form_data),
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
             )
 
-        data = response.json()
+            if response.status_code != 200:
+                raise RequestError(
+                    f"Edupage returned an error: status={response.status_code}"
+                )
+
+            data = response.json()
+
         if "timelineItems" not in data:
             raise MissingDataException(
                 "Unexpected response from edupage! (no events in this time period?)"
@@ -331,11 +618,271 @@ class TimelineEvents(Module):
         if user_props is None:
             user_props = self.__get_user_props()
 
-        return self.__parse_items(data["timelineItems"], user_props)
+        return data["timelineItems"], user_props
+
+    def __get_windowed_history_data(
+        self,
+        date_from: date,
+        date_to: Optional[date],
+        window_days: int,
+        max_workers: int,
+    ) -> tuple[list, dict]:
+        last_day = date_to or date.today()
+
+        windows = []
+        window_start = date_from
+        while window_start <= last_day:
+            window_end = min(window_start + timedelta(days=window_days - 1), last_day)
+            windows.append((window_start, window_end))
+            window_start = window_end + timedelta(days=1)
+
+        if not windows:
+            # the range starts after today
+            return [], {}
+
+        if date_to is None:
+            # like a single request, the last window is open-ended
+            windows[-1] = (windows[-1][0], None)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            window_data = list(
+                executor.map(lambda window: self.__get_history_data(*window), windows)
+            )
+
+        timeline_items = []
+        user_props = {}
+        seen_ids = set()
+        # every window is newest-first, like a single request, so the windows are merged
+        # from the newest one
+        for window_items, window_user_props in reversed(window_data):
+            for event in window_items:
+                event_id = event.get("timelineid")
+                if event_id in seen_ids:
+                    continue
+
+                seen_ids.add(event_id)
+                timeline_items.append(event)
+
+            user_props.update(window_user_props)
+
+        return timeline_items, user_props
+
+    def __get_history(
+        self,
+        date_from: date,
+        date_to: Optional[date],
+        window_days: Optional[int],
+        max_workers: int,
+    ) -> tuple[list, dict]:
+        if window_days is None:
+            return self.__get_history_data(date_from, date_to)
+
+        if window_days < 1:
+            raise ValueError(f"window_days must be at least 1, not {window_days}")
+
+        return self.__get_windowed_history_data(
+            date_from, date_to, window_days, max_workers
+        )
+
+    @ModuleHelper.logged_in
+    def get_notifications_history(
+        self,
+        date_from: date,
+        date_to: Optional[date] = None,
+        window_days: Optional[int] = None,
+        max_workers: int = 4,
+        lazy_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ):
+        timeline_items, user_props = self.__get_history(
+            date_from, date_to, window_days, max_workers
+        )
+
+        return self.__parse_items(
+            self.__filter_items(timeline_items, types, since, until, include_removed),
+            user_props,
+            lazy_data,
+        )
+
+    @ModuleHelper.logged_in
+    def iter_notification_history(
+        self,
+        date_from: date,
+        date_to: Optional[date] = None,
+        window_days: Optional[int] = None,
+        max_workers: int = 4,
+        lazy_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ) -> Iterator[TimelineEvent]:
+        # the requests are sent right away, only the parsing is deferred
+        timeline_items, user_props = self.__get_history(
+            date_from, date_to, window_days, max_workers
+        )
+
+        return self.__iter_items(
+            self.__filter_items(timeline_items, types, since, until, include_removed),
+            user_props,
+            lazy_data,
+        )
+
+    @ModuleHelper.logged_in
+    def get_notification_columns(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        window_days: Optional[int] = None,
+        max_workers: int = 4,
+        include_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ) -> TimelineColumns:
+        if date_from is None:
+            timeline_items = self.edupage.data.get("items") or []
+            user_props = self.__get_user_props()
+        else:
+            timeline_items, user_props = self.__get_history(
+                date_from, date_to, window_days, max_workers
+            )
+
+        return self.__build_columns(
+            self.__filter_items(timeline_items, types, since, until, include_removed),
+            user_props,
+            include_data,
+        )
+
+    @ModuleHelper.logged_in
+    def sync_notifications(
+        self,
+        cursor: Optional[TimelineCursor] = None,
+        date_from: Optional[date] = None,
+        lazy_data: bool = False,
+    ) -> TimelineSync:
+        if cursor is None and date_from is None:
+            # the first sync uses the notifications loaded at login
+            cursor = TimelineCursor()
+            timeline_items = self.edupage.data.get("items") or []
+            user_props = self.__get_user_props()
+        else:
+            if cursor is None:
+                cursor = TimelineCursor()
+
+            if date_from is None:
+                date_from = (
+                    cursor.created_at.date()
+                    if cursor.created_at is not None
+                    else cursor.started_at
+                )
+
+            timeline_items, user_props = self.__get_history_data(date_from)
+
+        new_cursor = TimelineCursor(
+            cursor.timeline_id,
+            cursor.created_at,
+            dict(cursor.user_props),
+            set(cursor.removed_ids),
+            cursor.started_at,
+        )
+        newest_created_at_str = None
+
+        new_items = []
+        changed_items = []
+        for event in timeline_items:
+            event_id_str = event.get("timelineid")
+            if not event_id_str:
+                continue
+
+            event_id = int(event_id_str)
+            props = user_props.get(event_id_str)
+            is_removed = event.get("removed") == "1"
+
+            # only the raw fields are compared, unchanged events are not parsed at all
+            if event_id > cursor.timeline_id:
+                new_items.append(event)
+            elif props != cursor.user_props.get(event_id_str) or is_removed != (
+                event_id in cursor.removed_ids
+            ):
+                changed_items.append(event)
+
+            new_cursor.timeline_id = max(new_cursor.timeline_id, event_id)
+
+            if props is None:
+                new_cursor.user_props.pop(event_id_str, None)
+            else:
+                new_cursor.user_props[event_id_str] = props
+
+            if is_removed:
+                new_cursor.removed_ids.add(event_id)
+            else:
+                new_cursor.removed_ids.discard(event_id)
+
+            created_at_str = event.get("cas_pridania")
+            if created_at_str and (
+                newest_created_at_str is None or created_at_str > newest_created_at_str
+            ):
+                newest_created_at_str = created_at_str
+
+        if newest_created_at_str is not None:
+            newest_created_at = ModuleHelper.strptime_or_none(
+                newest_created_at_str, "%Y-%m-%d %H:%M:%S"
+            )
+            if newest_created_at is not None and (
+                new_cursor.created_at is None
+                or newest_created_at > new_cursor.created_at
+            ):
+                new_cursor.created_at = newest_created_at
+
+        return TimelineSync(
+            self.__parse_items(new_items, user_props, lazy_data),
+            self.__parse_items(changed_items, user_props, lazy_data),
+            new_cursor,
+        )
 
     @ModuleHelper.logged_in
-    def get_notifications(self):
+    def get_notifications(
+        self,
+        lazy_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ):
         return self.__parse_items(
-            self.edupage.data.get("items"),  # pyright: ignore[reportArgumentType]
+            self.__filter_items(
+                self.edupage.data.get("items"),  # pyright: ignore[reportArgumentType]
+                types,
+                since,
+                until,
+                include_removed,
+            ),
+            self.__get_user_props(),
+            lazy_data,
+        )
+
+    @ModuleHelper.logged_in
+    def iter_notifications(
+        self,
+        lazy_data: bool = False,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        include_removed: bool = True,
+    ) -> Iterator[TimelineEvent]:
+        return self.__iter_items(
+            self.__filter_items(
+                self.edupage.data.get("items"),  # pyright: ignore[reportArgumentType]
+                types,
+                since,
+                until,
+                include_removed,
+            ),
             self.__get_user_props(),
+            lazy_data,
         )
@@ -0,0 +1,121 @@
+from array import array
+from typing import Optional
+
+
+class TimelineColumns:
+    """Timeline events stored column by column, for analytics.
+
+    The columns are built straight from the raw timeline items, without creating a
+    `TimelineEvent` for every event. Numbers and flags are stored in `array`s. The event type,
+    the author and the recipient are dictionary-encoded: `event_type_codes[i]` is the index
+    of the type of the `i`-th event in `event_types` (the raw `EventType` values), and
+    likewise for `authors` and `recipients`.
+
+    `to_arrow` and `to_parquet` need `pyarrow` (`pip install edupage_api[arrow]`).
+    """
+
+    def __init__(
+        self,
+        event_ids: array,
+        timestamps: array,
+        event_type_codes: array,
+        event_types: list[str],
+        texts: list[str],
+        author_codes: array,
+        authors: list[Optional[str]],
+        recipient_codes: array,
+        recipients: list[Optional[str]],
+        reaction_counts: array,
+        is_starred: array,
+        is_done: array,
+        is_removed: array,
+        additional_data: Optional[list[Optional[str]]] = None,
+    ):
+        # int64, the same as `TimelineEvent.event_id`
+        self.event_ids = event_ids
+        # int64, seconds since 1970-01-01 00:00:00 in edupage's (local) time
+        self.timestamps = timestamps
+        self.event_type_codes = event_type_codes
+        self.event_types = event_types
+        self.texts = texts
+        self.author_codes = author_codes
+        self.authors = authors
+        self.recipient_codes = recipient_codes
+        self.recipients = recipients
+        self.reaction_counts = reaction_counts
+        # int8, 0 or 1
+        self.is_starred = is_starred
+        self.is_done = is_done
+        self.is_removed = is_removed
+        # the raw JSON of `TimelineEvent.additional_data`, if it was exported
+        self.additional_data = additional_data
+
+    def __len__(self) -> int:
+        return len(self.event_ids)
+
+    @staticmethod
+    def __import_pyarrow():
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ImportError(
+                "Exporting to Arrow or Parquet needs pyarrow, "
+                "install it with `pip install edupage_api[arrow]`"
+            ) from e
+
+        return pyarrow
+
+    @staticmethod
+    def __to_array(pyarrow, values: array, arrow_type):
+        # `array`s are passed to arrow without copying them
+        return pyarrow.Array.from_buffers(
+            arrow_type, len(values), [None, pyarrow.py_buffer(values)]
+        )
+
+    def to_arrow(self):
+        """Convert the columns to a `pyarrow.Table`.
+
+        The event type, author and recipient columns are `pyarrow.DictionaryArray`s.
+        """
+
+        pyarrow = TimelineColumns.__import_pyarrow()
+        to_array = TimelineColumns.__to_array
+
+        def to_dictionary(codes: array, values: list):
+            return pyarrow.DictionaryArray.from_arrays(
+                to_array(pyarrow, codes, pyarrow.int32()),
+                pyarrow.array(values, pyarrow.string()),
+            )
+
+        def to_flags(values: array):
+            return to_array(pyarrow, values, pyarrow.int8()).cast(pyarrow.bool_())
+
+        columns = {
+            "event_id": to_array(pyarrow, self.event_ids, pyarrow.int64()),
+            "timestamp": to_array(pyarrow, self.timestamps, pyarrow.int64()).cast(
+                pyarrow.timestamp("s")
+            ),
+            "event_type": to_dictionary(self.event_type_codes, self.event_types),
+            "text": pyarrow.array(self.texts, pyarrow.string()),
+            "author": to_dictionary(self.author_codes, self.authors),
+            "recipient": to_dictionary(self.recipient_codes, self.recipients),
+            "reaction_count": to_array(pyarrow, self.reaction_counts, pyarrow.int32()),
+            "is_starred": to_flags(self.is_starred),
+            "is_done": to_flags(self.is_done),
+            "is_removed": to_flags(self.is_removed),
+        }
+
+        if self.additional_data is not None:
+            columns["additional_data"] = pyarrow.array(
+                self.additional_data, pyarrow.string()
+            )
+
+        return pyarrow.table(columns)
+
+    def to_parquet(self, path: str, **kwargs):
+        """Write the columns to a Parquet file (`kwargs` go to `pyarrow.parquet.write_table`)."""
+
+        TimelineColumns.__import_pyarrow()
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(self.to_arrow(), path, **kwargs)
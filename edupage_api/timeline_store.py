@@ -0,0 +1,281 @@
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional, Union
+
+from edupage_api.module import ModuleHelper
+from edupage_api.people import EduAccount
+from edupage_api.timeline import EventType, RawJson, TimelineEvent
+
+
+class TimelineStore:
+    """Local SQLite database of timeline events that can be queried without any requests.
+
+    If an `Edupage` object has a store, every notification it parses (with `get_notifications`,
+    `get_notification_history`, `sync_notifications`, ...) is also written to the store.
+    Events that are parsed again replace the stored ones, so their done, starred and removed
+    state stays up to date.
+
+    One store can be shared by many accounts: events are stored per account (the school's
+    subdomain and the user id), so the same timeline id of two schools, or the state of an
+    event seen by two users, never overwrite each other. Pass `subdomain` and `user_id` to
+    `query` to get the events of one account.
+
+    The author and the recipient are stored by name, and `additional_data` is decoded only when
+    it is first accessed on an event returned by `query`.
+    """
+
+    # number of events written in one transaction
+    BATCH_SIZE = 1000
+
+    __TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+    __SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            subdomain TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            event_id INTEGER NOT NULL,
+            event_type TEXT,
+            timestamp TEXT,
+            text TEXT,
+            author TEXT,
+            recipient TEXT,
+            additional_data TEXT,
+            is_done INTEGER NOT NULL,
+            done_at TEXT,
+            is_starred INTEGER NOT NULL,
+            reaction_count INTEGER NOT NULL,
+            created_at TEXT,
+            is_removed INTEGER NOT NULL,
+            PRIMARY KEY (subdomain, user_id, event_id)
+        );
+        CREATE INDEX IF NOT EXISTS events_event_type
+            ON events (subdomain, user_id, event_type, timestamp);
+        CREATE INDEX IF NOT EXISTS events_timestamp
+            ON events (subdomain, user_id, timestamp);
+        CREATE INDEX IF NOT EXISTS events_author
+            ON events (subdomain, user_id, author, timestamp);
+        CREATE INDEX IF NOT EXISTS events_recipient
+            ON events (subdomain, user_id, recipient, timestamp);
+    """
+
+    __EVENT_COLUMNS = (
+        "event_id, event_type, timestamp, text, author, recipient, additional_data, "
+        "is_done, done_at, is_starred, reaction_count, created_at, is_removed"
+    )
+
+    def __init__(self, path: str = ":memory:"):
+        """Open (or create) a timeline store.
+
+        Args:
+            path (str, optional): Path of the SQLite database file. Defaults to `":memory:"`
+                (the events are kept only as long as the store exists).
+        """
+
+        self.path = path
+
+        # the store is shared by the threads of an `Edupage` object, access is serialized
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+
+        with self.__lock, self.__connection:
+            self.__connection.executescript(TimelineStore.__SCHEMA)
+
+    @staticmethod
+    def __format_timestamp(timestamp: Optional[datetime]) -> Optional[str]:
+        if timestamp is None:
+            return None
+
+        return timestamp.strftime(TimelineStore.__TIMESTAMP_FORMAT)
+
+    @staticmethod
+    def __parse_timestamp(timestamp: Optional[str]) -> Optional[datetime]:
+        if timestamp is None:
+            return None
+
+        return ModuleHelper.parse_timestamp(timestamp)
+
+    @staticmethod
+    def __get_name(person: Union[EduAccount, str, None]) -> Optional[str]:
+        if isinstance(person, EduAccount):
+            return person.name
+
+        return person
+
+    @staticmethod
+    def __get_row(event: TimelineEvent, subdomain: str, user_id: str) -> tuple:
+        event_type = event.event_type
+
+        return (
+            subdomain,
+            user_id,
+            event.event_id,
+            event_type.value if event_type is not None else None,
+            TimelineStore.__format_timestamp(event.timestamp),
+            event.text,
+            TimelineStore.__get_name(event.author),
+            TimelineStore.__get_name(event.recipient),
+            TimelineEvent.additional_data.get_json(event),
+            event.is_done,
+            TimelineStore.__format_timestamp(event.done_at),
+            event.is_starred,
+            event.reaction_count,
+            TimelineStore.__format_timestamp(event.created_at),
+            event.is_removed,
+        )
+
+    @staticmethod
+    def __parse_row(row: tuple) -> TimelineEvent:
+        (
+            event_id,
+            event_type,
+            timestamp,
+            text,
+            author,
+            recipient,
+            additional_data,
+            is_done,
+            done_at,
+            is_starred,
+            reaction_count,
+            created_at,
+            is_removed,
+        ) = row
+
+        return TimelineEvent(
+            event_id,
+            TimelineStore.__parse_timestamp(timestamp),
+            text,
+            author,
+            recipient,
+            EventType.parse(event_type),
+            RawJson(additional_data),
+            is_done=bool(is_done),
+            done_at=TimelineStore.__parse_timestamp(done_at),
+            is_starred=bool(is_starred),
+            reaction_count=reaction_count,
+            created_at=TimelineStore.__parse_timestamp(created_at),
+            is_removed=bool(is_removed),
+        )
+
+    def add_events(
+        self, events: Iterable[TimelineEvent], subdomain: str, user_id: str
+    ):
+        """Write the `events` of an account, replacing its stored events with the same id."""
+
+        rows = [
+            TimelineStore.__get_row(event, subdomain, user_id) for event in events
+        ]
+        if not rows:
+            return
+
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                "INSERT OR REPLACE INTO events "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def write_through(
+        self, events: Iterable[TimelineEvent], subdomain: str, user_id: str
+    ) -> Iterator[TimelineEvent]:
+        """Yield the `events` of an account while writing them to the store in batches."""
+
+        batch = []
+        try:
+            for event in events:
+                batch.append(event)
+                if len(batch) >= TimelineStore.BATCH_SIZE:
+                    self.add_events(batch, subdomain, user_id)
+                    batch = []
+
+                yield event
+        finally:
+            # also write the events that were yielded before the iteration was stopped
+            self.add_events(batch, subdomain, user_id)
+
+    def query(
+        self,
+        subdomain: Optional[str] = None,
+        user_id: Optional[str] = None,
+        types: Optional[Iterable[EventType]] = None,
+        since: Optional[Union[date, datetime]] = None,
+        until: Optional[Union[date, datetime]] = None,
+        author: Optional[Union[EduAccount, str]] = None,
+        recipient: Optional[Union[EduAccount, str]] = None,
+        include_removed: bool = True,
+    ) -> list[TimelineEvent]:
+        """Get the stored events that match all of the given filters, ordered by timestamp.
+
+        Args:
+            subdomain (Optional[str], optional): Only events of this school. Defaults to `None`.
+            user_id (Optional[str], optional): Only events of this user (`Edupage.get_user_id`).
+                Defaults to `None`.
+            types (Optional[Iterable[EventType]], optional): Only events of these types.
+                Defaults to `None` (all types).
+            since (Optional[Union[datetime.date, datetime.datetime]], optional): Only events
+                at or after this time. Defaults to `None`.
+            until (Optional[Union[datetime.date, datetime.datetime]], optional): Only events
+                before this time (a date means its midnight). Defaults to `None`.
+            author (Optional[Union[EduAccount, str]], optional): Only events by this person
+                (or name). Defaults to `None`.
+            recipient (Optional[Union[EduAccount, str]], optional): Only events for this person
+                (or name). Defaults to `None`.
+            include_removed (bool, optional): Also return removed events. Defaults to `True`.
+
+        Returns:
+            list[TimelineEvent]: The matching events.
+        """
+
+        conditions = []
+        parameters = []
+
+        if subdomain is not None:
+            conditions.append("subdomain = ?")
+            parameters.append(subdomain)
+
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            parameters.append(user_id)
+
+        if types is not None:
+            event_types = [EventType(event_type).value for event_type in types]
+            if not event_types:
+                return []
+
+            placeholders = ", ".join("?" * len(event_types))
+            conditions.append(f"event_type IN ({placeholders})")
+            parameters.extend(event_types)
+
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            parameters.append(ModuleHelper.format_timestamp_bound(since))
+
+        if until is not None:
+            conditions.append("timestamp < ?")
+            parameters.append(ModuleHelper.format_timestamp_bound(until))
+
+        if author is not None:
+            conditions.append("author = ?")
+            parameters.append(TimelineStore.__get_name(author))
+
+        if recipient is not None:
+            conditions.append("recipient = ?")
+            parameters.append(TimelineStore.__get_name(recipient))
+
+        if not include_removed:
+            conditions.append("is_removed = 0")
+
+        request = f"SELECT {TimelineStore.__EVENT_COLUMNS} FROM events"
+        if conditions:
+            request += " WHERE " + " AND ".join(conditions)
+        request += " ORDER BY timestamp, event_id"
+
+        with self.__lock:
+            rows = self.__connection.execute(request, parameters).fetchall()
+
+        return [TimelineStore.__parse_row(row) for row in rows]
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
@@ -1,10 +1,14 @@
 import json
-from dataclasses import dataclass
-from datetime import date, datetime, time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
 from typing import List, Optional, Union
 
 from edupage_api.classes import Class, Classes
 from edupage_api.classrooms import Classroom, Classrooms
+from edupage_api.dashboard import Dashboard, DashboardTokens
 from edupage_api.exceptions import (
     InsufficientPermissionsException,
     MissingDataException,
@@ -38,12 +42,16 @@ class Lesson:
 
     @ModuleHelper.online_lesson
     def sign_into_lesson(self, edupage: EdupageModule):
-        request_url = f"https://{edupage.subdomain}.edupage.org/dashboard/eb.php"
+        dashboard = Dashboard(edupage)
 
-        response = edupage.session.get(request_url)
-
-        gse_hash = response.content.decode().split("gsechash=")[1].split('"')[1]
+        try:
+            return self.__open_online_lesson(edupage, dashboard.get_tokens())
+        except json.JSONDecodeError:
+            # the cached gsechash was rejected, load a fresh one and try again
+            dashboard.invalidate_tokens()
+            return self.__open_online_lesson(edupage, dashboard.get_tokens())
 
+    def __open_online_lesson(self, edupage: EdupageModule, tokens: DashboardTokens):
         request_url = f"https://{edupage.subdomain}.edupage.org/dashboard/server/onlinelesson.js?__func=getOnlineLessonOpenUrl"
         today = datetime.today()
         post_data = {
@@ -56,34 +64,118 @@ class Lesson:
                     "subjectid": self.subject_id,
                 },
             ],
-            "__gsh": gse_hash,
+            "__gsh": tokens.gsec_hash or edupage.gsec_hash,
         }
 
-        response = edupage.session.post(request_url, json=post_data)
+        response = edupage.transport.post(request_url, json=post_data)
         return json.loads(response.content.decode()).get("reload") is not None
 
 
+class LessonIndex:
+    """Lessons of a timetable sorted by their start time.
+
+    Point and next-lesson queries are answered by bisection. `max_ends[i]` is the latest
+    end time of the first `i + 1` lessons, so the first lesson still running at a given
+    time is the first one whose `max_ends` entry is not before that time.
+    """
+
+    def __init__(self, lessons: List[Lesson]):
+        self.lessons = sorted(
+            (
+                lesson
+                for lesson in lessons
+                if lesson.start_time is not None and lesson.end_time is not None
+            ),
+            key=lambda lesson: lesson.start_time,
+        )
+        self.starts = [lesson.start_time for lesson in self.lessons]
+        self.max_ends = list(accumulate((l.end_time for l in self.lessons), max))
+
+        self.online_lessons = [l for l in self.lessons if l.is_online_lesson()]
+        self.online_starts = [lesson.start_time for lesson in self.online_lessons]
+
+    def lesson_at(self, time: time) -> Optional[Lesson]:
+        started = bisect_right(self.starts, time)
+        running = bisect_left(self.max_ends, time)
+
+        if running < started:
+            return self.lessons[running]
+
+    def next_lesson(self, time: time) -> Optional[Lesson]:
+        i = bisect_right(self.starts, time)
+        if i < len(self.lessons):
+            return self.lessons[i]
+
+    def next_online_lesson(self, time: time) -> Optional[Lesson]:
+        i = bisect_right(self.online_starts, time)
+        if i < len(self.online_lessons):
+            return self.online_lessons[i]
+
+    def lessons_at(self, times: List[time]) -> List[Optional[Lesson]]:
+        output = [None] * len(times)
+
+        # both pointers only move forward when the times are visited in order
+        started = 0
+        running = 0
+        for i in sorted(range(len(times)), key=times.__getitem__):
+            time = times[i]
+
+            while started < len(self.starts) and self.starts[started] <= time:
+                started += 1
+
+            while running < len(self.max_ends) and self.max_ends[running] < time:
+                running += 1
+
+            if running < started:
+                output[i] = self.lessons[running]
+
+        return output
+
+
 @dataclass
 class Timetable:
     lessons: List[Lesson]
 
+    __index: Optional[LessonIndex] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    __index_key: Optional[tuple] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     def __iter__(self):
         return iter(self.lessons)
 
+    def __get_index(self) -> LessonIndex:
+        # built on first query, and again if anything it depends on has changed: the list,
+        # any of its lessons (also replaced in place), or their times and online links;
+        # comparing this is much cheaper than sorting the lessons again
+        index_key = tuple(
+            (id(lesson), lesson.start_time, lesson.end_time, lesson.online_lesson_link)
+            for lesson in self.lessons
+        )
+        if self.__index is None or self.__index_key != index_key:
+            self.__index = LessonIndex(self.lessons)
+            self.__index_key = index_key
+
+        return self.__index
+
     def get_lesson_at_time(self, time: time):
-        for lesson in self.lessons:
-            if time >= lesson.start_time and time <= lesson.end_time:
-                return lesson
+        return self.__get_index().lesson_at(time)
 
     def get_next_lesson_at_time(self, time: time):
-        for lesson in self.lessons:
-            if time < lesson.start_time:
-                return lesson
+        return self.__get_index().next_lesson(time)
 
     def get_next_online_lesson_at_time(self, time: time):
-        for lesson in self.lessons:
-            if time < lesson.start_time and lesson.is_online_lesson():
-                return lesson
+        return self.__get_index().next_online_lesson(time)
+
+    def lessons_at(self, times: List[time]) -> List[Optional[Lesson]]:
+        """Get the lesson taking place at each of `times` (`None` where there is no lesson).
+
+        The times are resolved together in a single pass over the lessons.
+        """
+
+        return self.__get_index().lessons_at(list(times))
 
     def get_first_lesson(self):
         if len(self.lessons) > 0:
@@ -94,6 +186,14 @@ class Timetable:
             return self.lessons[-1]
 
 
+@dataclass
+class TimetableBatch:
+    # (target, timetables by date) for every target that was fetched successfully
+    timetables: List[tuple[Union[EduTeacher, EduStudent, Class, Classroom], dict]]
+    # (target, exception) for every target that failed
+    errors: List[tuple[Union[EduTeacher, EduStudent, Class, Classroom], Exception]]
+
+
 class Timetables(Module):
     def get_school_year(self):
         dp = self.edupage.data.get("dp")
@@ -103,14 +203,16 @@ class Timetables(Module):
 
         return dp.get("year")
 
-    def __get_timetable_data(self, target_id: int, table: str, date: date):
+    def __get_timetable_data(
+        self, target_id: int, table: str, date_from: date, date_to: date
+    ):
         request_data = {
             "__args": [
                 None,
                 {
                     "year": self.get_school_year(),
-                    "datefrom": date.strftime("%Y-%m-%d"),
-                    "dateto": date.strftime("%Y-%m-%d"),
+                    "datefrom": date_from.strftime("%Y-%m-%d"),
+                    "dateto": date_to.strftime("%Y-%m-%d"),
                     "table": table,
                     "id": str(target_id),
                     "showColors": True,
@@ -127,17 +229,18 @@ class Timetables(Module):
             "timetable/server/currenttt.js?__func=curentttGetData"
         )
 
-        timetable_data = self.edupage.session.post(
+        timetable_data = self.edupage.transport.post(
             request_url, json=request_data
         ).content.decode()
         timetable_data = json.loads(timetable_data)
 
         timetable_data_response = timetable_data.get("r")
-        timetable_data_error = timetable_data_response.get("error")
 
         if timetable_data_response is None:
             raise MissingDataException("The server returned an incorrect response.")
 
+        timetable_data_error = timetable_data_response.get("error")
+
         if timetable_data_error is not None:
             raise RequestError(
                 f"Edupage returned an error response: {timetable_data_error}"
@@ -145,52 +248,73 @@ class Timetables(Module):
 
         return timetable_data_response.get("ttitems")
 
-    def __get_date_plan(self, date: date):
-        csrf_request_url = (
-            f"https://{self.edupage.subdomain}.edupage.org/dashboard/eb.php?mode=ttday"
-        )
-        csrf_response = self.edupage.session.get(csrf_request_url)
-
-        gpid = csrf_response.text.split("gpid=")[1].split("&")[0]
-        gsh = csrf_response.text.split("gsh=")[1].split('"')[0]
-
-        next_gpid = int(gpid) + 1
-
+    def __post_load_data(self, tokens: DashboardTokens, date_from: date, date_to: date):
         url = f"https://{self.edupage.subdomain}.edupage.org/gcall"
-        curriculum_response = self.edupage.session.post(
+        return self.edupage.transport.post(
             url,
             data=RequestUtil.encode_form_data(
                 {
-                    "gpid": str(next_gpid),
-                    "gsh": gsh,
+                    "gpid": str(tokens.next_gpid()),
+                    "gsh": tokens.gsh,
                     "action": "loadData",
                     "user": self.edupage.get_user_id(),
                     "changes": "{}",
-                    "date": date.strftime("%Y-%m-%d"),
-                    "dateto": date.strftime("%Y-%m-%d"),
+                    "date": date_from.strftime("%Y-%m-%d"),
+                    "dateto": date_to.strftime("%Y-%m-%d"),
                     "_LJSL": "4096",
                 }
             ),
             headers={"Content-Type": "application/x-www-form-urlencoded"},
         )
 
+    def __get_date_plans(self, date_from: date, date_to: date) -> dict:
+        dashboard = Dashboard(self.edupage)
         response_start = self.edupage.get_user_id() + '",'
-        response_end = ",["
 
-        curriculum_json = curriculum_response.text.split(response_start)[1].rsplit(
-            response_end, 1
-        )[0]
+        curriculum_response = self.__post_load_data(
+            dashboard.get_tokens(), date_from, date_to
+        )
+        curriculum_text = curriculum_response.text
+
+        json_start = curriculum_text.find(response_start)
+        if json_start == -1:
+            # the cached tokens were rejected, load fresh ones and try again
+            dashboard.invalidate_tokens()
+            curriculum_response = self.__post_load_data(
+                dashboard.get_tokens(), date_from, date_to
+            )
+            curriculum_text = curriculum_response.text
+
+            json_start = curriculum_text.find(response_start)
+            if json_start == -1:
+                raise MissingDataException("The server returned an incorrect response.")
 
-        data = json.loads(curriculum_json)
+        # decode the object in place, without copying the (large) response text
+        json_start = json.decoder.WHITESPACE.match(
+            curriculum_text, json_start + len(response_start)
+        ).end()
+        data, _ = json.JSONDecoder().raw_decode(curriculum_text, json_start)
 
         dates = data.get("dates")
-        date_plans = dates.get(date.strftime("%Y-%m-%d"))
+        if dates is None:
+            raise MissingDataException()
+
+        return dates
+
+    def __get_date_plan(self, date: date):
+        date_plans = self.__get_date_plans(date, date).get(date.strftime("%Y-%m-%d"))
         if date_plans is None:
             raise MissingDataException()
 
         return date_plans.get("plan")
 
     def __parse_timetable(self, plan):
+        # all lookups below are served by the entity registry of the current DBI snapshot
+        subjects = Subjects(self.edupage)
+        classes_module = Classes(self.edupage)
+        people = People(self.edupage)
+        classrooms_module = Classrooms(self.edupage)
+
         lessons = []
         for lesson in plan:
             if "header" in lesson and (
@@ -215,12 +339,12 @@ class Timetables(Module):
             duration = lesson.get("durationperiods", 1)
 
             subject_id = lesson.get("subjectid")
-            subject = Subjects(self.edupage).get_subject(subject_id)
+            subject = subjects.get_subject(subject_id)
 
             classes = [
                 edu_class
                 for class_id in lesson.get("classids", [])
-                if (edu_class := Classes(self.edupage).get_class(class_id)) is not None
+                if (edu_class := classes_module.get_class(class_id)) is not None
             ]
 
             groups = [group for group in lesson.get("groupnames") if group != ""]
@@ -228,13 +352,13 @@ class Timetables(Module):
             teachers = [
                 teacher
                 for teacher_id in lesson.get("teacherids", [])
-                if (teacher := People(self.edupage).get_teacher(teacher_id)) is not None
+                if (teacher := people.get_teacher(teacher_id)) is not None
             ]
 
             classrooms = [
                 classroom
                 for classroom_id in lesson.get("classroomids", [])
-                if (classroom := Classrooms(self.edupage).get_classroom(classroom_id))
+                if (classroom := classrooms_module.get_classroom(classroom_id))
                 is not None
             ]
 
@@ -282,13 +406,12 @@ class Timetables(Module):
         plan = self.__get_date_plan(date)
         return self.__parse_timetable(plan)
 
-    @ModuleHelper.logged_in
-    def get_timetable(
+    def __get_target_timetable_data(
         self,
         target: Union[EduTeacher, EduStudent, Class, Classroom],
-        date: date,
-    ) -> Optional[Timetable]:
-
+        date_from: date,
+        date_to: date,
+    ):
         lookup = {
             EduTeacher: ("teachers", "person_id"),
             EduStudent: ("students", "person_id"),
@@ -300,11 +423,85 @@ class Timetables(Module):
         target_id = getattr(target, target_id_attr)
 
         try:
-            timetable_data = self.__get_timetable_data(target_id, table, date)
+            return self.__get_timetable_data(target_id, table, date_from, date_to)
         except RequestError as e:
             if "insuficient" in str(e).lower():
                 raise InsufficientPermissionsException(f"Missing permissions: {str(e)}")
+            raise
         except Exception as e:
             raise UnknownServerError(f"There was an unknown error: {str(e)}")
 
+    @ModuleHelper.logged_in
+    def get_my_timetable_range(
+        self, date_from: date, date_to: date
+    ) -> dict[date, Timetable]:
+        date_plans = self.__get_date_plans(date_from, date_to)
+
+        timetables = {}
+        for date_str, date_plan in date_plans.items():
+            plan_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            timetables[plan_date] = self.__parse_timetable(date_plan.get("plan", []))
+
+        return timetables
+
+    @ModuleHelper.logged_in
+    def get_timetable(
+        self,
+        target: Union[EduTeacher, EduStudent, Class, Classroom],
+        date: date,
+    ) -> Optional[Timetable]:
+        timetable_data = self.__get_target_timetable_data(target, date, date)
+
         return self.__parse_timetable(timetable_data)
+
+    @ModuleHelper.logged_in
+    def get_timetable_range(
+        self,
+        target: Union[EduTeacher, EduStudent, Class, Classroom],
+        date_from: date,
+        date_to: date,
+    ) -> dict[date, Timetable]:
+        timetable_data = self.__get_target_timetable_data(target, date_from, date_to)
+
+        plans_by_date = {
+            date_from + timedelta(days=i): []
+            for i in range((date_to - date_from).days + 1)
+        }
+
+        for lesson in timetable_data:
+            lesson_date_str = lesson.get("date")
+            if not lesson_date_str:
+                continue
+
+            lesson_date = datetime.strptime(lesson_date_str, "%Y-%m-%d").date()
+            plans_by_date.setdefault(lesson_date, []).append(lesson)
+
+        return {
+            plan_date: self.__parse_timetable(plan)
+            for plan_date, plan in plans_by_date.items()
+        }
+
+    @ModuleHelper.logged_in
+    def get_timetables(
+        self,
+        targets: List[Union[EduTeacher, EduStudent, Class, Classroom]],
+        date_from: date,
+        date_to: date,
+        max_workers: int = 8,
+    ) -> TimetableBatch:
+        def fetch(target):
+            return self.get_timetable_range(target, date_from, date_to)
+
+        batch = TimetableBatch([], [])
+
+        # the workers share `edupage.transport` and its connection pool
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(target, executor.submit(fetch, target)) for target in targets]
+
+            for target, future in futures:
+                try:
+                    batch.timetables.append((target, future.result()))
+                except Exception as e:
+                    batch.errors.append((target, e))
+
+        return batch
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class Transport(requests.Session):
+    """The HTTP session every module sends its requests with (also `Edupage.session`).
+
+    It keeps a pool of connections per host (up to `pool_maxsize` each), so that concurrent
+    requests (`get_timetables`, windowed history downloads, ...) reuse open connections
+    instead of opening new ones and repeating the TLS handshake. Every request gets the
+    default `timeout` unless it sets its own.
+
+    Subclass it to change how requests are sent, and pass it to `Edupage(transport=...)`.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = 5,
+        pool_connections: int = 10,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        prewarm_connections: int = 0,
+    ):
+        """Create a transport.
+
+        Args:
+            timeout (Optional[float], optional): Default request timeout in seconds.
+                Defaults to `5`.
+            pool_connections (int, optional): Number of hosts whose connection pools are kept.
+                Defaults to `10`.
+            pool_maxsize (int, optional): Maximum number of open connections kept per host.
+                Set it to at least the number of requests you send at once. Defaults to `16`.
+            pool_block (bool, optional): Wait for a free connection instead of opening a new one
+                (that is not kept) when all `pool_maxsize` connections of a host are in use.
+                Defaults to `False`.
+            keep_alive (bool, optional): Keep the connections open between requests.
+                Defaults to `True`.
+            prewarm_connections (int, optional): Number of connections to your school's server
+                opened in the background right after logging in. Defaults to `0`.
+        """
+
+        super().__init__()
+
+        self.timeout = timeout
+        self.prewarm_connections = prewarm_connections
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+        if not keep_alive:
+            self.headers["Connection"] = "close"
+
+    def request(self, method, url, *args, **kwargs) -> requests.Response:
+        # `timeout` can also be passed positionally, as the 7th argument after `url`
+        if len(args) < 7:
+            kwargs.setdefault("timeout", self.timeout)
+
+        return super().request(method, url, *args, **kwargs)
+
+    def __open_connection(self, url: str):
+        try:
+            self.head(url, allow_redirects=False).close()
+        except requests.RequestException:
+            # only an optimization, the real request will report the error
+            pass
+
+    def prewarm(
+        self, url: str, connections: Optional[int] = None, wait_for: bool = False
+    ):
+        """Open `connections` connections to the host of `url` and keep them in the pool.
+
+        Args:
+            url (str): Any url on the host (it gets a `HEAD` request).
+            connections (Optional[int], optional): Number of connections.
+                Defaults to `None` (`prewarm_connections`).
+            wait_for (bool, optional): Wait until the connections are open. Defaults to `False`.
+        """
+
+        if connections is None:
+            connections = self.prewarm_connections
+
+        if connections <= 0:
+            return
+
+        # the requests are sent at the same time, so that each one opens its own connection
+        executor = ThreadPoolExecutor(max_workers=connections)
+        futures = [
+            executor.submit(self.__open_connection, url) for _ in range(connections)
+        ]
+        executor.shutdown(wait=False)
+
+        if wait_for:
+            wait(futures)
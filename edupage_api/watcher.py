@@ -0,0 +1,277 @@
+import threading
+import time
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+from edupage_api.module import EdupageModule
+from edupage_api.timeline import TimelineCursor, TimelineEvent, TimelineEvents
+
+
+@dataclass
+class WatchedTimeline:
+    edupage: EdupageModule
+    cursor: Optional[TimelineCursor]
+    # seconds between two polls of this account
+    interval: float
+    # new and changed events per second, smoothed over the last polls
+    event_rate: float = 0.0
+    # `time.monotonic()` of the next and of the last poll
+    next_poll: float = 0.0
+    last_poll: Optional[float] = None
+    # number of failed polls in a row
+    errors: int = 0
+    is_polling: bool = False
+
+
+class TimelineWatcher:
+    """Polls the timelines of many `Edupage` accounts and reports new and changed events.
+
+    All accounts share one pool of worker threads. Every account is polled with
+    `sync_notifications`, at an interval that follows its activity: the more events it got
+    recently (an exponentially weighted moving average of its event rate), the more often it
+    is polled. Outside of `active_hours` the interval is multiplied by `quiet_factor`, and
+    failed polls back off exponentially. All intervals stay between `min_interval` and
+    `max_interval`.
+
+    The callbacks are called from the worker threads, with the account and the events.
+    Exceptions raised by `on_new_events` and `on_changed_events` are passed to `on_error`.
+    """
+
+    # weight of the newest poll in the event rate average
+    RATE_SMOOTHING = 0.3
+
+    def __init__(
+        self,
+        on_new_events: Optional[
+            Callable[[EdupageModule, list[TimelineEvent]], None]
+        ] = None,
+        on_changed_events: Optional[
+            Callable[[EdupageModule, list[TimelineEvent]], None]
+        ] = None,
+        on_error: Optional[Callable[[EdupageModule, Exception], None]] = None,
+        min_interval: float = 30,
+        max_interval: float = 900,
+        events_per_poll: float = 1,
+        active_hours: tuple[int, int] = (6, 20),
+        quiet_factor: float = 4,
+        max_workers: int = 4,
+    ):
+        """Create a watcher, use `add` to watch accounts and `start` to start polling.
+
+        Args:
+            on_new_events (Optional[Callable[[Edupage, list[TimelineEvent]], None]], optional):
+                Called with the events that are new since the last poll. Defaults to `None`.
+            on_changed_events (Optional[Callable[[Edupage, list[TimelineEvent]], None]], optional):
+                Called with the already seen events whose done, starred or removed state has
+                changed. Defaults to `None`.
+            on_error (Optional[Callable[[Edupage, Exception], None]], optional): Called when a
+                poll fails. Defaults to `None`.
+            min_interval (float, optional): Shortest interval between two polls of one account
+                in seconds. Defaults to `30`.
+            max_interval (float, optional): Longest interval between two polls of one account
+                in seconds. Defaults to `900`.
+            events_per_poll (float, optional): The interval is chosen so that a poll returns about
+                this many events at the recent event rate. Defaults to `1`.
+            active_hours (tuple[int, int], optional): Hours of the day (from, to) when the school
+                is active. Defaults to `(6, 20)`.
+            quiet_factor (float, optional): The interval is multiplied by this outside of
+                `active_hours`. Defaults to `4`.
+            max_workers (int, optional): Maximum number of accounts polled at once. Defaults to `4`.
+        """
+
+        self.on_new_events = on_new_events
+        self.on_changed_events = on_changed_events
+        self.on_error = on_error
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.events_per_poll = events_per_poll
+        self.active_hours = active_hours
+        self.quiet_factor = quiet_factor
+
+        self.max_workers = max_workers
+
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__timelines: dict[int, WatchedTimeline] = {}
+        self.__lock = threading.Lock()
+        # set to wake up the scheduler (when stopping or when an account was added)
+        self.__wake_up = threading.Event()
+        self.__stopped = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def add(self, edupage: EdupageModule, cursor: Optional[TimelineCursor] = None):
+        """Start watching the timeline of `edupage` (it has to be logged in).
+
+        Without a `cursor`, the first poll only records the current events and does not report
+        them. Pass the cursor from `get_cursor` to continue where a previous watcher stopped.
+        """
+
+        with self.__lock:
+            self.__timelines[id(edupage)] = WatchedTimeline(
+                edupage, cursor, self.min_interval, next_poll=time.monotonic()
+            )
+
+        self.__wake_up.set()
+
+    def remove(self, edupage: EdupageModule):
+        with self.__lock:
+            self.__timelines.pop(id(edupage), None)
+
+    def get_cursor(self, edupage: EdupageModule) -> Optional[TimelineCursor]:
+        timeline = self.__timelines.get(id(edupage))
+        if timeline is None:
+            return None
+
+        return timeline.cursor
+
+    def get_interval(self, edupage: EdupageModule) -> Optional[float]:
+        """Get the current interval between two polls of `edupage` in seconds."""
+
+        timeline = self.__timelines.get(id(edupage))
+        if timeline is None:
+            return None
+
+        return timeline.interval
+
+    def __is_quiet(self) -> bool:
+        start_hour, end_hour = self.active_hours
+        return not start_hour <= datetime.now().hour < end_hour
+
+    def __get_interval(self, timeline: WatchedTimeline) -> float:
+        if timeline.errors:
+            interval = self.min_interval * 2**timeline.errors
+        elif timeline.event_rate > 0:
+            interval = self.events_per_poll / timeline.event_rate
+        else:
+            interval = self.max_interval
+
+        if self.__is_quiet():
+            interval *= self.quiet_factor
+
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def __notify(
+        self,
+        callback: Optional[Callable[[EdupageModule, list[TimelineEvent]], None]],
+        timeline: WatchedTimeline,
+        events: list[TimelineEvent],
+    ):
+        if callback is None:
+            return
+
+        try:
+            callback(timeline.edupage, events)
+        except Exception as e:
+            # the poll itself succeeded, so this does not back off the polling
+            if self.on_error is not None:
+                self.on_error(timeline.edupage, e)
+
+    def __poll(self, timeline: WatchedTimeline):
+        now = time.monotonic()
+
+        try:
+            sync = TimelineEvents(timeline.edupage).sync_notifications(timeline.cursor)
+        except Exception as e:
+            timeline.errors += 1
+            if self.on_error is not None:
+                self.on_error(timeline.edupage, e)
+        else:
+            is_first_poll = timeline.cursor is None
+            timeline.cursor = sync.cursor
+            timeline.errors = 0
+
+            event_count = len(sync.new_events) + len(sync.changed_events)
+            if not is_first_poll and timeline.last_poll is not None:
+                elapsed = max(now - timeline.last_poll, 1)
+                timeline.event_rate = (
+                    TimelineWatcher.RATE_SMOOTHING * (event_count / elapsed)
+                    + (1 - TimelineWatcher.RATE_SMOOTHING) * timeline.event_rate
+                )
+            timeline.last_poll = now
+
+            if not is_first_poll:
+                if sync.new_events:
+                    self.__notify(self.on_new_events, timeline, sync.new_events)
+
+                if sync.changed_events:
+                    self.__notify(self.on_changed_events, timeline, sync.changed_events)
+        finally:
+            timeline.interval = self.__get_interval(timeline)
+            timeline.next_poll = time.monotonic() + timeline.interval
+
+            with self.__lock:
+                timeline.is_polling = False
+
+            self.__wake_up.set()
+
+    def __submit(self, timelines: list[WatchedTimeline]) -> list[futures.Future]:
+        submitted = []
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+            for timeline in timelines:
+                if timeline.is_polling:
+                    continue
+
+                timeline.is_polling = True
+                submitted.append(self.__executor.submit(self.__poll, timeline))
+
+        return submitted
+
+    def poll_once(self):
+        """Poll all watched accounts now and wait until all polls are finished."""
+
+        with self.__lock:
+            timelines = list(self.__timelines.values())
+
+        futures.wait(self.__submit(timelines))
+
+    def __run(self):
+        while not self.__stopped.is_set():
+            now = time.monotonic()
+
+            with self.__lock:
+                timelines = list(self.__timelines.values())
+
+            self.__submit(
+                [timeline for timeline in timelines if timeline.next_poll <= now]
+            )
+
+            waiting = [
+                timeline.next_poll for timeline in timelines if not timeline.is_polling
+            ]
+            timeout = min(waiting, default=self.max_interval) - now
+
+            self.__wake_up.wait(max(timeout, 0.1))
+            self.__wake_up.clear()
+
+    def start(self):
+        """Start polling in a background thread."""
+
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+
+        self.__stopped.clear()
+        self.__thread = threading.Thread(
+            target=self.__run, name="TimelineWatcher", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop polling. With `wait`, also wait for the polls that are running."""
+
+        self.__stopped.set()
+        self.__wake_up.set()
+
+        if self.__thread is not None and wait:
+            self.__thread.join()
+
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
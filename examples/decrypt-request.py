@@ -16,7 +16,7 @@ for pair in pairs:
     request_data[unquote(key)] = unquote(value)
 
 s = request_data["eqap"]
-compressed = RequestData.chromium_base64_decode(s[3:])
+compressed = RequestData.chromium_base64_decode_bytes(s[3:])
 
-decompressed = zlib.decompress(bytes([ord(ch) for ch in compressed]), wbits=-15)
+decompressed = zlib.decompress(compressed, wbits=-15)
 print(unquote(decompressed.decode()))
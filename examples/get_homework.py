@@ -10,11 +10,10 @@ edupage.login(
     "Subdomain of your school (SUBDOMAIN.edupage.org)",
 )
 
-notifications = edupage.get_notifications()
+homework = edupage.get_notifications(types=[EventType.HOMEWORK])
 
 homework_not_due = 0
 
-homework = list(filter(lambda x: x.event_type == EventType.HOMEWORK, notifications))
 for hw in homework:
     additional_data = hw.additional_data
 
@@ -0,0 +1,30 @@
+import time
+
+from edupage_api import Edupage
+from edupage_api.watcher import TimelineWatcher
+
+
+def print_new_events(edupage, events):
+    for event in events:
+        print(f"[{edupage.username}] {event.timestamp} {event.event_type}: {event.text}")
+
+
+def print_error(edupage, error):
+    print(f"[{edupage.username}] failed to poll: {error}")
+
+
+watcher = TimelineWatcher(on_new_events=print_new_events, on_error=print_error)
+
+for username, password in [("First username", "Password"), ("Second username", "Password")]:
+    edupage = Edupage()
+    edupage.login(username, password, "Subdomain of your school (SUBDOMAIN.edupage.org)")
+
+    watcher.add(edupage)
+
+watcher.start()
+
+try:
+    while True:
+        time.sleep(1)
+except KeyboardInterrupt:
+    watcher.stop()
@@ -0,0 +1,185 @@
+"""Tests of the `TimelineWatcher` scheduling with stubbed accounts.
+
+Every account is a real `Edupage` object whose requests are answered by a small fake
+timeline server, so `sync_notifications` runs unchanged. All accounts start without any
+notifications at login, and the watcher is driven with `poll_once`.
+
+Run with: python -m unittest discover tests
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from edupage_api import Edupage
+from edupage_api.watcher import TimelineWatcher
+
+MIN_INTERVAL = 0.01
+MAX_INTERVAL = 100
+
+
+class FakeResponse:
+    def __init__(self, data: dict, status_code: int = 200):
+        self.status_code = status_code
+        self.__data = data
+
+    def json(self) -> dict:
+        return self.__data
+
+
+class FakeTimelineServer:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = []
+        self.is_failing = False
+
+    def add_notification(self):
+        timeline_id = len(self.items) + 1
+        created_at = (datetime(2024, 1, 1) + timedelta(minutes=timeline_id)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+
+        # newest first, like edupage
+        self.items.insert(
+            0,
+            {
+                "timelineid": str(timeline_id),
+                "typ": "news",
+                "timestamp": created_at,
+                "text": f"{self.name} {timeline_id}",
+                "user_meno": "*",
+                "vlastnik_meno": "*",
+                "data": "{}",
+                "cas_pridania": created_at,
+                "removed": "0",
+            },
+        )
+
+    def post(self, url, **kwargs) -> FakeResponse:
+        if self.is_failing:
+            return FakeResponse({}, status_code=500)
+
+        return FakeResponse({"timelineItems": self.items, "timelineUserProps": {}})
+
+
+class TimelineWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.reported = {}
+        self.errors = {}
+
+        self.watcher = TimelineWatcher(
+            on_new_events=self.__on_new_events,
+            on_error=self.__on_error,
+            min_interval=MIN_INTERVAL,
+            max_interval=MAX_INTERVAL,
+            active_hours=(0, 24),
+        )
+        self.addCleanup(self.watcher.stop)
+
+        self.servers = {}
+        self.accounts = {}
+
+    def __on_new_events(self, edupage, events):
+        self.reported.setdefault(edupage.username, []).extend(
+            event.event_id for event in events
+        )
+
+    def __on_error(self, edupage, error):
+        self.errors[edupage.username] = self.errors.get(edupage.username, 0) + 1
+
+    def __add_account(self, name: str) -> FakeTimelineServer:
+        server = FakeTimelineServer(name)
+
+        edupage = Edupage()
+        edupage.subdomain = name
+        edupage.username = name
+        edupage.is_logged_in = True
+        edupage.data = {"dbi": {}, "items": [], "userProps": {}}
+        edupage.transport.post = server.post
+
+        self.servers[name] = server
+        self.accounts[name] = edupage
+        self.watcher.add(edupage)
+
+        return server
+
+    def __get_interval(self, name: str) -> float:
+        return self.watcher.get_interval(self.accounts[name])
+
+    def test_first_poll_reports_nothing(self):
+        server = self.__add_account("busy")
+        server.add_notification()
+
+        self.watcher.poll_once()
+
+        self.assertEqual(self.reported, {})
+        self.assertEqual(self.errors, {})
+
+    def test_new_events_are_reported_newest_first(self):
+        server = self.__add_account("busy")
+        self.watcher.poll_once()
+
+        for _ in range(3):
+            for _ in range(3):
+                server.add_notification()
+
+            self.watcher.poll_once()
+
+        self.assertEqual(self.reported["busy"], [3, 2, 1, 6, 5, 4, 9, 8, 7])
+
+    def test_interval_follows_event_rate(self):
+        server = self.__add_account("busy")
+        self.watcher.poll_once()
+
+        # the polls follow each other in less than a second, which is the shortest time the
+        # event rate is measured over, so the rate is the smoothed number of events per poll
+        smoothing = TimelineWatcher.RATE_SMOOTHING
+        rate = 0.0
+        for _ in range(3):
+            for _ in range(3):
+                server.add_notification()
+
+            self.watcher.poll_once()
+
+            rate = smoothing * 3 + (1 - smoothing) * rate
+            self.assertAlmostEqual(self.__get_interval("busy"), 1 / rate)
+
+    def test_quiet_account_is_polled_at_max_interval(self):
+        self.__add_account("quiet")
+
+        for _ in range(3):
+            self.watcher.poll_once()
+            self.assertEqual(self.__get_interval("quiet"), MAX_INTERVAL)
+
+        self.assertNotIn("quiet", self.reported)
+
+    def test_first_notification_after_first_poll_is_reported(self):
+        server = self.__add_account("late")
+        self.watcher.poll_once()
+        self.watcher.poll_once()
+
+        server.add_notification()
+        self.watcher.poll_once()
+
+        self.assertEqual(self.reported["late"], [1])
+        self.assertAlmostEqual(
+            self.__get_interval("late"), 1 / TimelineWatcher.RATE_SMOOTHING
+        )
+
+    def test_failing_account_backs_off(self):
+        server = self.__add_account("failing")
+        self.watcher.poll_once()
+
+        server.is_failing = True
+        for poll in range(1, 4):
+            self.watcher.poll_once()
+            self.assertEqual(self.__get_interval("failing"), MIN_INTERVAL * 2**poll)
+
+        self.assertEqual(self.errors, {"failing": 3})
+
+        server.is_failing = False
+        self.watcher.poll_once()
+        self.assertEqual(self.__get_interval("failing"), MAX_INTERVAL)
+
+
+if __name__ == "__main__":
+    unittest.main()